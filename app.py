@@ -1,14 +1,33 @@
-from fastapi import FastAPI, Response, Form, Request, File, UploadFile
+from fastapi import FastAPI, Response, Form, Request, File, UploadFile, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
+import asyncio
+import io
+import time
+import threading
+import zipfile
 import numpy as np
 import cv2
 import json
+from typing import List, Optional, Tuple
+from PIL import Image
 from utils.motion_methods import ALL_METHODS, CUSTOM_METHODS, LIBRARY_METHODS, get_method_category
-from utils.evaluation_metrics import compare_methods
-from utils.visualization import create_flow_visualization, create_comparison_grid
+from utils.evaluation_metrics import compare_methods, calculate_flow_statistics, abandoned_stats
+from utils.visualization import create_flow_visualization, create_comparison_grid, encode_image, IMAGE_FORMATS
+from utils.flow_cache import flow_cache
+from utils.pair_store import pair_store
+from utils.artifact_store import artifact_store
+from utils.compute_pool import compute_pool, PoolSaturated, ClientDisconnected, DEFAULT_RETRY_AFTER
+from utils.jobs import job_manager
+from utils.batch import archive_pairs, read_members
+from utils.streaming import FlowStream
+from utils.flow_io import FLOW_FORMATS, FLOW_EXTENSIONS, encode_flow
+from utils.timing import StageTimer
+from utils.profiling import PROFILING_ENABLED, RequestProfile, active_profile
+from utils.telemetry import request_latency, stage_latency, method_latency, size_bucket, render_metrics
+from utils.quality import QUALITY_TIERS, DEFAULT_QUALITY, apply_quality, get_quality_scale, downscale_frame, resize_flow
 
 app = FastAPI()
 
@@ -24,165 +43,851 @@ app.add_middleware(
 )
 
 
+def deadline_report(results: dict) -> dict:
+    """Response headers listing methods truncated, downgraded or skipped by a deadline."""
+    report = {}
+    for method_name, result in results.items():
+        info = result.get("method_info", {})
+        if info.get("truncated"):
+            report[method_name] = {k: v for k, v in info.items() if k.startswith("truncated")}
+        elif result.get("downgraded"):
+            report[method_name] = {"downgraded": True}
+        elif result.get("skipped"):
+            report[method_name] = {"skipped": True}
+    return {"X-Flow-Deadline": json.dumps(report)} if report else {}
+
+
+def decode_image(data: bytes) -> Optional[np.ndarray]:
+    """Decode image bytes in colour; None if they are not an image."""
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+GRAYSCALE_DECODE_FLAGS = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4}
+
+
+def decode_gray(data: bytes, reduction: int = 1) -> Optional[np.ndarray]:
+    """Decode image bytes straight to grayscale, at 1/``reduction`` resolution; None if not an image."""
+    return cv2.imdecode(np.frombuffer(data, np.uint8), GRAYSCALE_DECODE_FLAGS[reduction])
+
+
+# EXIF orientations that rotate the image by 90 degrees, swapping its width and height
+TRANSPOSING_ORIENTATIONS = (5, 6, 7, 8)
+
+
+def image_shape(data: bytes) -> Optional[Tuple[int, int]]:
+    """(height, width) read from the image header without decoding, after EXIF rotation; None if unreadable."""
+    try:
+        image = Image.open(io.BytesIO(data))
+        width, height = image.size
+        if image.getexif().get(0x0112) in TRANSPOSING_ORIENTATIONS:
+            width, height = height, width
+        return height, width
+    except Exception:
+        return None
+
+
+def decoded_shape(shape: Tuple[int, int], reduced: Tuple[int, ...], reduction: int) -> Tuple[int, int]:
+    """
+    Full-resolution shape of a frame decoded at 1/``reduction`` as ``reduced``.
+
+    Whether the decoder applies EXIF orientation depends on the format,
+    so the header ``shape`` or its transpose is taken, whichever the
+    reduced decode matches; otherwise the reduced shape is scaled up.
+    """
+    for candidate in (tuple(shape), tuple(shape[::-1])):
+        if all(abs(full / reduction - size) <= 1 for full, size in zip(candidate, reduced[:2])):
+            return candidate
+    return reduced[0] * reduction, reduced[1] * reduction
+
+
+def decode_reduction(quality: str) -> int:
+    """Decoder reduction (1, 2 or 4) that does not go below the quality tier's processing scale."""
+    scale = get_quality_scale(quality)
+    return 4 if scale <= 0.25 else 2 if scale <= 0.5 else 1
+
+
+async def read_pair(image1: Optional[UploadFile], image2: Optional[UploadFile], pair_id: Optional[str],
+                    quality: str = DEFAULT_QUALITY, timer: StageTimer = None):
+    """A loader for the request's grayscale frames, or an error response.
+
+    Uploads are only read here; the returned loader decodes them so that
+    the decode runs on the compute pool. Uploads are decoded straight to
+    grayscale, at reduced resolution when the quality tier processes at
+    half or quarter scale anyway. The loader takes a ``StageTimer`` and
+    returns (gray1, gray2, reduction, original shape), or None when an
+    upload is not a decodable image.
+    """
+    if pair_id:
+        pair = pair_store.get(pair_id)
+        if pair is None:
+            return JSONResponse(status_code=404, content={"error": "Unknown pair"})
+        gray1, gray2 = pair["gray"]
+        if timer is not None:
+            timer.frame_shape = gray1.shape[:2]
+        return lambda timer: (gray1, gray2, 1, gray1.shape)
+    if image1 is None or image2 is None:
+        return JSONResponse(status_code=400, content={"error": "Provide image1 and image2 or a pair_id"})
+    with (timer or StageTimer()).stage("read"):
+        data1 = await image1.read()
+        data2 = await image2.read()
+    if timer is not None:
+        # Known before decoding, for endpoints that answer before the pair is processed
+        timer.frame_shape = image_shape(data1)
+    return pair_loader(lambda: (data1, data2), quality)
+
+
+def pair_loader(read, quality: str = DEFAULT_QUALITY):
+    """A ``read_pair``-style loader for the encoded frames returned by ``read()``.
+
+    ``read`` is only called when the loader runs, so the bytes need not be
+    held before then.
+    """
+    reduction = decode_reduction(quality) if quality in QUALITY_TIERS else 1
+
+    def load(timer: StageTimer):
+        with timer.stage("decode"):
+            data1, data2 = read()
+            shape = image_shape(data1) if reduction != 1 else None
+            factor = reduction if shape is not None else 1
+            gray1, gray2 = decode_gray(data1, factor), decode_gray(data2, factor)
+        if gray1 is None or gray2 is None:
+            return None
+        if shape is not None:
+            shape = decoded_shape(shape, gray1.shape, factor)
+        return gray1, gray2, factor, shape or gray1.shape
+    return load
+
+
+def run_methods(frames, methods: dict, quality: str, timer: StageTimer, **kwargs) -> Tuple[dict, np.ndarray]:
+    """Run ``compare_methods`` on a loaded pair at the quality tier's scale.
+
+    Flows come back at the original resolution even when the frames were
+    decoded reduced. Returns the results and the first frame at that
+    resolution, for visualizations.
+    """
+    gray1, gray2, reduction, shape = frames
+    timer.frame_shape = tuple(shape[:2])
+    # A profiled request recomputes everything: a cache hit would hide where the time goes
+    profile = active_profile()
+    with timer.stage("compute"):
+        results = compare_methods(gray1, gray2, apply_quality(methods, quality),
+                                  scale=get_quality_scale(quality) * reduction, output_shape=shape,
+                                  cache=flow_cache if profile is None else None, timer=timer,
+                                  profile=profile, **kwargs)
+    size = size_bucket(timer.frame_shape)
+    for method_name, result in results.items():
+        if result["success"] and not result.get("cached"):
+            method_latency.observe(result["execution_time"], method_name, size)
+    if gray1.shape[:2] != tuple(shape):
+        gray1 = cv2.resize(gray1, (shape[1], shape[0]), interpolation=cv2.INTER_LINEAR)
+    return results, gray1
+
+
+def request_timer(request: Request) -> StageTimer:
+    """A stage timer for the request; the metrics middleware records its stages once the response is sent."""
+    request.state.timer = StageTimer()
+    return request.state.timer
+
+
+def record_stages(endpoint: str, timer: StageTimer) -> None:
+    """Observe a timer's stages for ``endpoint``, labelled by its frame size."""
+    size = size_bucket(timer.frame_shape)
+    for stage, seconds in timer.stages.items():
+        stage_latency.observe(seconds, endpoint, stage, size)
+
+
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Observe each request's latency and stage timings, per endpoint and image size.
+
+    They are recorded once the whole body has been sent, so streamed
+    responses (NDJSON, Server-Sent Events) count until their last line.
+    """
+    started = time.perf_counter()
+    response = await call_next(request)
+    body = response.body_iterator
+
+    async def observed_body():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            route = request.scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            timer = getattr(request.state, "timer", None)
+            size = size_bucket(timer.frame_shape if timer is not None else None)
+            request_latency.observe(time.perf_counter() - started, endpoint, str(response.status_code), size)
+            if timer is not None:
+                record_stages(endpoint, timer)
+
+    response.body_iterator = observed_body()
+    return response
+
+
+async def run_compute(request: Request, work, profile: bool = False):
+    """Run a request's CPU-bound work on the compute pool, answering 503 when it is saturated.
+
+    With ``profile`` (refused unless FLOW_PROFILING is set) the work and
+    the methods it runs are profiled with cProfile; the response links
+    the top functions by cumulative time as JSON (X-Profile) and the full
+    profile as a .prof file (X-Profile-Stats).
+    """
+    if profile and not PROFILING_ENABLED:
+        return JSONResponse(status_code=403, content={"error": "Profiling is disabled"})
+    request_profile = RequestProfile() if profile else None
+    try:
+        if request_profile is not None:
+            response = await compute_pool.run(lambda: request_profile.run(work), disconnected=request.is_disconnected)
+        else:
+            response = await compute_pool.run(work, disconnected=request.is_disconnected)
+    except PoolSaturated:
+        return JSONResponse(status_code=503, content={"error": "Server busy"},
+                            headers={"Retry-After": str(DEFAULT_RETRY_AFTER)})
+    except ClientDisconnected:
+        # Nobody is listening; 499 only shows up in the access log
+        return Response(status_code=499)
+
+    if request_profile is not None:
+        summary_id = artifact_store.put(request_profile.summary_json(), "application/json")
+        stats_id = artifact_store.put(request_profile.dump(), "application/octet-stream")
+        response.headers["X-Profile"] = f"/artifacts/{summary_id}"
+        response.headers["X-Profile-Stats"] = f"/artifacts/{stats_id}"
+    return response
+
+
+def render_comparison(results: dict, gray1: np.ndarray) -> np.ndarray:
+    """Grid of the successful methods' flows, or the frame itself if none succeeded."""
+    flow_results = {}
+    for method_name, result in results.items():
+        if not result["success"]:
+            print(f"Method {method_name} failed: {result.get('error')}")
+            continue
+        flow_results[method_name] = result["flow_vectors"]
+    return create_comparison_grid(flow_results, gray1) if flow_results else gray1
+
+
+def json_result(method_name: str, result: dict) -> dict:
+    """A method result with its category and without the heavy flow arrays."""
+    result = {k: v for k, v in result.items() if k != "flow_vectors"}
+    result["category"] = get_method_category(method_name)
+    return result
+
+
+def store_image(image: np.ndarray, timer: StageTimer, image_format: str = "png", image_quality: int = None,
+                max_dimension: int = None) -> str:
+    """Encode an image into the artifact store and return its URL."""
+    with timer.stage("encode"):
+        content, media_type = encode_image(image, image_format, image_quality, max_dimension)
+    return f"/artifacts/{artifact_store.put(content, media_type)}"
+
+
+def image_response(image: np.ndarray, timer: StageTimer, headers: dict, image_format: str = "png",
+                   image_quality: int = None, max_dimension: int = None) -> Response:
+    """Encode an image as the response body, with the stage timings in Server-Timing."""
+    with timer.stage("encode"):
+        content, media_type = encode_image(image, image_format, image_quality, max_dimension)
+    return Response(content=content, media_type=media_type, headers=dict(headers, **timer.headers()))
+
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-@app.post("/single-method")
-async def single_method_analysis(image1: UploadFile = File(...), image2: UploadFile = File(...), method_name: str = Form(...)):
-    """Process single method and return visualization with metrics."""
+@app.post("/pairs")
+async def create_pair(request: Request, image1: UploadFile = File(...), image2: UploadFile = File(...),
+                      keep_color: bool = Form(False)):
+    """Decode a frame pair once and keep it server-side for later analysis requests."""
     try:
-        data1 = await image1.read()
-        data2 = await image2.read()
+        timer = request_timer(request)
+        with timer.stage("read"):
+            data1 = await image1.read()
+            data2 = await image2.read()
+
+        def work():
+            with timer.stage("decode"):
+                if keep_color:
+                    frame1, frame2 = decode_image(data1), decode_image(data2)
+                else:
+                    frame1, frame2 = gray1, gray2 = decode_gray(data1), decode_gray(data2)
+            if frame1 is None or frame2 is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
+            if keep_color:
+                with timer.stage("grayscale"):
+                    gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
+                    gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+            timer.frame_shape = gray1.shape[:2]
+
+            if keep_color:
+                pair_id = pair_store.put(gray1, gray2, frame1, frame2)
+            else:
+                pair_id = pair_store.put(gray1, gray2)
+            if pair_id is None:
+                return JSONResponse(status_code=413, content={"error": "Pair too large"})
+
+            return JSONResponse(content={"pair_id": pair_id, "shape": list(gray1.shape), "ttl": pair_store.ttl},
+                                headers=timer.headers())
+
+        return await run_compute(request, work)
 
-        arr1 = np.frombuffer(data1, np.uint8)
-        arr2 = np.frombuffer(data2, np.uint8)
-        frame1 = cv2.imdecode(arr1, cv2.IMREAD_COLOR)
-        frame2 = cv2.imdecode(arr2, cv2.IMREAD_COLOR)
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+
+@app.delete("/pairs/{pair_id}")
+async def delete_pair(pair_id: str):
+    """Drop a stored frame pair."""
+    if not pair_store.delete(pair_id):
+        return JSONResponse(status_code=404, content={"error": "Unknown pair"})
+    return JSONResponse(content={"deleted": pair_id})
+
+
+@app.post("/single-method")
+async def single_method_analysis(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None), method_name: str = Form(...),
+                                 quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                                 pair_id: Optional[str] = Form(None),
+                                 image_format: str = Form("png"), image_quality: Optional[int] = Form(None),
+                                 max_dimension: Optional[int] = Form(None), profile: bool = Form(False)):
+    """Process single method and return visualization with metrics."""
+    try:
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
 
         if method_name not in ALL_METHODS:
             return JSONResponse(status_code=400, content={"error": "Unknown method"})
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        if image_format not in IMAGE_FORMATS:
+            return JSONResponse(status_code=400, content={"error": "Unknown image format"})
+
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
 
-        method_func = ALL_METHODS[method_name]
-        results = compare_methods(gray1, gray2, {method_name: method_func})
+            results, gray1 = run_methods(frames, {method_name: ALL_METHODS[method_name]}, quality, timer,
+                                         deadline_ms=deadline_ms)
 
-        if not results[method_name]["success"]:
-            return JSONResponse(status_code=500, content={"error": results[method_name].get("error", "Method failed")})
+            if not results[method_name]["success"]:
+                return JSONResponse(status_code=500, content={"error": results[method_name].get("error", "Method failed")})
 
-        # Use the flow vectors from compare_methods to avoid double execution
-        u, v = results[method_name]["flow_vectors"]
+            # Use the flow vectors from compare_methods to avoid double execution
+            u, v = results[method_name]["flow_vectors"]
 
-        result_img = create_flow_visualization(u, v, gray1, scale=3, step=15)
+            with timer.stage("visualize"):
+                result_img = create_flow_visualization(u, v, gray1, scale=3, step=15)
 
-        success, buffer = cv2.imencode('.png', result_img)
-        if not success:
-            return JSONResponse(status_code=500, content={"error": "Encoding failed"})
+            return image_response(result_img, timer, deadline_report(results), image_format, image_quality,
+                                  max_dimension)
 
-        return Response(content=buffer.tobytes(), media_type="image/png")
+        return await run_compute(request, work, profile)
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.post("/single-method-metrics")
-async def single_method_metrics(image1: UploadFile = File(...), image2: UploadFile = File(...), method_name: str = Form(...)):
+async def single_method_metrics(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None), method_name: str = Form(...),
+                                quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                                pair_id: Optional[str] = Form(None), profile: bool = Form(False)):
     """Get metrics for a single method without running all methods."""
     try:
-        data1 = await image1.read()
-        data2 = await image2.read()
-
-        arr1 = np.frombuffer(data1, np.uint8)
-        arr2 = np.frombuffer(data2, np.uint8)
-        frame1 = cv2.imdecode(arr1, cv2.IMREAD_COLOR)
-        frame2 = cv2.imdecode(arr2, cv2.IMREAD_COLOR)
-
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
 
         if method_name not in ALL_METHODS:
             return JSONResponse(status_code=400, content={"error": "Unknown method"})
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
 
-        method_func = ALL_METHODS[method_name]
-        results = compare_methods(gray1, gray2, {method_name: method_func})
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
 
-        # Add method category and remove flow_vectors for JSON response
-        result = results[method_name].copy()
-        result["category"] = get_method_category(method_name)
-        if "flow_vectors" in result:
-            # Remove heavy arrays from JSON response
-            del result["flow_vectors"]
+            results, gray1 = run_methods(frames, {method_name: ALL_METHODS[method_name]}, quality, timer,
+                                         deadline_ms=deadline_ms)
 
-        return JSONResponse(content=result)
+            return JSONResponse(content=json_result(method_name, results[method_name]), headers=timer.headers())
+
+        return await run_compute(request, work, profile)
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.post("/compare-methods")
-async def compare_all_methods(image1: UploadFile = File(...), image2: UploadFile = File(...)):
+async def compare_all_methods(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None),
+                              quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                              pair_id: Optional[str] = Form(None), profile: bool = Form(False)):
     """Compare all methods and return comprehensive analysis."""
     try:
-        data1 = await image1.read()
-        data2 = await image2.read()
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
 
-        arr1 = np.frombuffer(data1, np.uint8)
-        arr2 = np.frombuffer(data2, np.uint8)
-        frame1 = cv2.imdecode(arr1, cv2.IMREAD_COLOR)
-        frame2 = cv2.imdecode(arr2, cv2.IMREAD_COLOR)
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
 
-        # Convert to grayscale
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
 
-        # Compare all methods
-        results = compare_methods(gray1, gray2, ALL_METHODS)
+            # Compare all methods
+            results, gray1 = run_methods(frames, ALL_METHODS, quality, timer, deadline_ms=deadline_ms)
 
-        # Add method categories and remove flow_vectors for JSON response
-        for method_name in results:
-            results[method_name]["category"] = get_method_category(method_name)
-            if "flow_vectors" in results[method_name]:
-                # Remove heavy arrays from JSON response
-                del results[method_name]["flow_vectors"]
+            return JSONResponse(content={name: json_result(name, result) for name, result in results.items()},
+                                headers=timer.headers())
 
-        return JSONResponse(content=results)
+        return await run_compute(request, work, profile)
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
 @app.post("/visualize-comparison")
-async def visualize_comparison(image1: UploadFile = File(...), image2: UploadFile = File(...), selected_methods: str = Form(...)):
+async def visualize_comparison(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None), selected_methods: str = Form(...),
+                               quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                               pair_id: Optional[str] = Form(None),
+                               image_format: str = Form("png"), image_quality: Optional[int] = Form(None),
+                               max_dimension: Optional[int] = Form(None), profile: bool = Form(False)):
     """Create grid visualization comparing selected methods."""
     try:
         method_names = json.loads(selected_methods)
 
-        data1 = await image1.read()
-        data2 = await image2.read()
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
+
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        if image_format not in IMAGE_FORMATS:
+            return JSONResponse(status_code=400, content={"error": "Unknown image format"})
+
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
+
+            selected_method_funcs = {
+                name: ALL_METHODS[name] for name in method_names if name in ALL_METHODS}
+            results, gray1 = run_methods(frames, selected_method_funcs, quality, timer, deadline_ms=deadline_ms)
+            with timer.stage("visualize"):
+                grid_image = render_comparison(results, gray1)
 
-        arr1 = np.frombuffer(data1, np.uint8)
-        arr2 = np.frombuffer(data2, np.uint8)
-        frame1 = cv2.imdecode(arr1, cv2.IMREAD_COLOR)
-        frame2 = cv2.imdecode(arr2, cv2.IMREAD_COLOR)
+            return image_response(grid_image, timer, deadline_report(results), image_format, image_quality,
+                                  max_dimension)
 
-        gray1 = cv2.cvtColor(frame1, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(frame2, cv2.COLOR_BGR2GRAY)
+        return await run_compute(request, work, profile)
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
+
+@app.post("/analyze-single")
+async def analyze_single(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None), method_name: str = Form(...),
+                         quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                         pair_id: Optional[str] = Form(None),
+                         image_format: str = Form("png"), image_quality: Optional[int] = Form(None),
+                         max_dimension: Optional[int] = Form(None), profile: bool = Form(False)):
+    """Run one method once and return its metrics with a short-lived URL of the visualization."""
+    try:
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
+
+        if method_name not in ALL_METHODS:
+            return JSONResponse(status_code=400, content={"error": "Unknown method"})
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        if image_format not in IMAGE_FORMATS:
+            return JSONResponse(status_code=400, content={"error": "Unknown image format"})
+
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
+
+            results, gray1 = run_methods(frames, {method_name: ALL_METHODS[method_name]}, quality, timer,
+                                         deadline_ms=deadline_ms)
+
+            if not results[method_name]["success"]:
+                return JSONResponse(status_code=500, content={"error": results[method_name].get("error", "Method failed")})
+
+            u, v = results[method_name]["flow_vectors"]
+            with timer.stage("visualize"):
+                result_img = create_flow_visualization(u, v, gray1, scale=3, step=15)
+            image_url = store_image(result_img, timer, image_format, image_quality, max_dimension)
+
+            return JSONResponse(content={"result": json_result(method_name, results[method_name]), "image_url": image_url,
+                                         "timings": timer.as_dict()}, headers=timer.headers())
+
+        return await run_compute(request, work, profile)
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/analyze-comparison")
+async def analyze_comparison(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None), selected_methods: str = Form(...),
+                             quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                             pair_id: Optional[str] = Form(None),
+                             image_format: str = Form("png"), image_quality: Optional[int] = Form(None),
+                             max_dimension: Optional[int] = Form(None), profile: bool = Form(False)):
+    """Run the selected methods once and return their metrics with a short-lived URL of the comparison grid."""
+    try:
+        method_names = json.loads(selected_methods)
+
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
+
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        if image_format not in IMAGE_FORMATS:
+            return JSONResponse(status_code=400, content={"error": "Unknown image format"})
+
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
+
+            selected_method_funcs = {
+                name: ALL_METHODS[name] for name in method_names if name in ALL_METHODS}
+            results, gray1 = run_methods(frames, selected_method_funcs, quality, timer, deadline_ms=deadline_ms)
+
+            with timer.stage("visualize"):
+                grid_image = render_comparison(results, gray1)
+            image_url = store_image(grid_image, timer, image_format, image_quality, max_dimension)
+
+            return JSONResponse(content={
+                "results": {name: json_result(name, result) for name, result in results.items()},
+                "image_url": image_url,
+                "timings": timer.as_dict()
+            }, headers=timer.headers())
+
+        return await run_compute(request, work, profile)
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.post("/export-flow")
+async def export_flow(request: Request, image1: Optional[UploadFile] = File(None), image2: Optional[UploadFile] = File(None),
+                      method_name: str = Form(...), flow_format: str = Form("flo", alias="format"), compress: bool = Form(False),
+                      scale: Optional[float] = Form(None), quality: str = Form(DEFAULT_QUALITY),
+                      pair_id: Optional[str] = Form(None), profile: bool = Form(False)):
+    """Download the raw (u, v) flow of one method as .flo, float16 .npy or quantized int16."""
+    try:
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
+
+        if method_name not in ALL_METHODS:
+            return JSONResponse(status_code=400, content={"error": "Unknown method"})
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        if flow_format not in FLOW_FORMATS:
+            return JSONResponse(status_code=400, content={"error": "Unknown format"})
+
+        def work():
+            frames = load(timer)
+            if frames is None:
+                return JSONResponse(status_code=400, content={"error": "Could not decode images"})
+
+            results, _ = run_methods(frames, {method_name: ALL_METHODS[method_name]}, quality, timer)
+            if not results[method_name]["success"]:
+                return JSONResponse(status_code=500, content={"error": results[method_name].get("error", "Method failed")})
+
+            u, v = results[method_name]["flow_vectors"]
+            filename = "flow" + FLOW_EXTENSIONS[flow_format] + (".zz" if compress else "")
+            with timer.stage("encode"):
+                content = encode_flow(u, v, flow_format, compress, scale)
+            return Response(content=content, media_type="application/octet-stream",
+                            headers=dict({"Content-Disposition": f'attachment; filename="{filename}"'}, **timer.headers()))
+
+        return await run_compute(request, work, profile)
+
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+
+@app.get("/artifacts/{artifact_id}")
+async def get_artifact(artifact_id: str):
+    """Serve a rendered image produced by one of the analyze endpoints."""
+    artifact = artifact_store.get(artifact_id)
+    if artifact is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown artifact"})
+    content, media_type = artifact
+    return Response(content=content, media_type=media_type, headers={"Cache-Control": "private, max-age=60"})
+
+
+@app.post("/jobs")
+async def submit_job(request: Request, image1: Optional[UploadFile] = File(None),
+                     image2: Optional[UploadFile] = File(None), selected_methods: Optional[str] = Form(None),
+                     quality: str = Form(DEFAULT_QUALITY), deadline_ms: Optional[float] = Form(None),
+                     pair_id: Optional[str] = Form(None)):
+    """Start a comparison in the background; results stream from /jobs/{job_id}/events.
+
+    The request's metrics cover the submission; the job's own stages are
+    recorded under /jobs when it finishes.
+    """
+    try:
+        timer = request_timer(request)
+        load = await read_pair(image1, image2, pair_id, quality, timer)
+        if isinstance(load, JSONResponse):
+            return load
+
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        method_names = json.loads(selected_methods) if selected_methods else list(ALL_METHODS)
         selected_method_funcs = {
             name: ALL_METHODS[name] for name in method_names if name in ALL_METHODS}
-        flow_results = {}
 
-        for method_name, method_func in selected_method_funcs.items():
-            try:
-                u, v = method_func(gray1, gray2)
-                flow_results[method_name] = (u, v)
-            except Exception as e:
-                print(f"Method {method_name} failed: {e}")
-                continue
-
-        if flow_results:
-            grid_image = create_comparison_grid(flow_results, gray1)
-        else:
-            grid_image = gray1
+        job = job_manager.create(asyncio.get_running_loop())
+
+        def on_result(method_name, result):
+            job.results[method_name] = json_result(method_name, result)
+            job.publish("method", dict(job.results[method_name], method=method_name))
+
+        def work():
+            job.status = "running"
+            job_timer = StageTimer()
+            frames = load(job_timer)
+            if frames is None:
+                job.finish("failed", {"error": "Could not decode images"})
+                return
+
+            results, _ = run_methods(frames, selected_method_funcs, quality, job_timer, deadline_ms=deadline_ms,
+                                     on_result=on_result, cancel_event=job.cancel_event)
+
+            comparison = {name: result["comparison_metrics"] for name, result in results.items()
+                          if "comparison_metrics" in result}
+            for method_name, metrics in comparison.items():
+                job.results[method_name]["comparison_metrics"] = metrics
+            pairwise = {name: result["pairwise_metrics"] for name, result in results.items()
+                        if "pairwise_metrics" in result}
+            for method_name, metrics in pairwise.items():
+                job.results[method_name]["pairwise_metrics"] = metrics
+            job.publish("pairwise", pairwise)
+            job.publish("comparison", comparison)
+            record_stages("/jobs", job_timer)
+            job.finish("cancelled" if job.cancel_event.is_set() else "done",
+                       {"timings": dict(timer.as_dict(), **job_timer.as_dict())})
+
+        def on_done(future):
+            if not future.cancelled() and future.exception() is not None:
+                job.finish("failed", {"error": str(future.exception())})
+
+        try:
+            job.future = compute_pool.submit(work)
+        except PoolSaturated:
+            job.finish("failed", {"error": "Server busy"})
+            return JSONResponse(status_code=503, content={"error": "Server busy"},
+                                headers={"Retry-After": str(DEFAULT_RETRY_AFTER)})
+        job.future.add_done_callback(on_done)
+
+        return JSONResponse(status_code=202, content={
+            "job_id": job.id,
+            "status_url": f"/jobs/{job.id}",
+            "events_url": f"/jobs/{job.id}/events"
+        })
 
-        success, buffer = cv2.imencode('.png', grid_image)
-        if not success:
-            return JSONResponse(status_code=500, content={"error": "Encoding failed"})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
 
-        return Response(content=buffer.tobytes(), media_type="image/png")
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status of a job and the results received so far."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job"})
+    return JSONResponse(content=job.summary())
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job(job_id: str):
+    """Server-Sent Events: one "method" event per finished method, then "comparison" and a final status event."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job"})
+
+    async def events():
+        async for event in job.stream():
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a job: methods that have not started are dropped, finished results are kept."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return JSONResponse(status_code=404, content={"error": "Unknown job"})
+    job.cancel_event.set()
+    if job.future.cancel():
+        # Never started, so nothing else will report the outcome
+        job.finish("cancelled")
+    return JSONResponse(content=job.summary())
+
+
+@app.post("/batch")
+async def batch(request: Request, archive: Optional[UploadFile] = File(None),
+                images: Optional[List[UploadFile]] = File(None), selected_methods: Optional[str] = Form(None), quality: str = Form(DEFAULT_QUALITY),
+                deadline_ms: Optional[float] = Form(None)):
+    """
+    Run the selected methods on many frame pairs and stream NDJSON, one line per (pair, method).
+
+    Pairs come from a zip ``archive`` (consecutive images within each
+    directory) or from ``images`` uploaded in order, two per pair. Pairs
+    are decoded lazily on the compute pool, a few at a time, and lines
+    are written as each pair finishes, so the order follows completion.
+    The request's stage timings add up every pair's, and its size label
+    is that of the largest pair.
+    """
+    try:
+        timer = request_timer(request)
+        if quality not in QUALITY_TIERS:
+            return JSONResponse(status_code=400, content={"error": "Unknown quality"})
+        method_names = json.loads(selected_methods) if selected_methods else list(ALL_METHODS)
+        selected_method_funcs = {
+            name: ALL_METHODS[name] for name in method_names if name in ALL_METHODS}
+
+        if archive is not None:
+            try:
+                zip_file = zipfile.ZipFile(archive.file)
+            except zipfile.BadZipFile:
+                return JSONResponse(status_code=400, content={"error": "Not a zip archive"})
+            pairs = [(pair, lambda pair=pair: read_members(zip_file, pair)) for pair in archive_pairs(zip_file)]
+        elif images and len(images) >= 2 and len(images) % 2 == 0:
+            pairs = [({"pair": str(i), "frame1": first.filename, "frame2": second.filename},
+                      lambda first=first, second=second: (first.file.read(), second.file.read()))
+                     for i, (first, second) in enumerate(zip(images[::2], images[1::2]))]
+        else:
+            return JSONResponse(status_code=400, content={"error": "Provide a zip archive or an even number of images"})
+        if not pairs:
+            return JSONResponse(status_code=400, content={"error": "No frame pairs found"})
+
+        cancel_event = threading.Event()
+
+        def pair_work(pair, read):
+            def work():
+                pair_timer = StageTimer()
+                try:
+                    frames = pair_loader(read, quality)(pair_timer)
+                    if frames is None:
+                        return pair_timer, [dict(pair, error="Could not decode images")]
+                    results, _ = run_methods(frames, selected_method_funcs, quality, pair_timer,
+                                             deadline_ms=deadline_ms, cancel_event=cancel_event)
+                except Exception as e:
+                    return pair_timer, [dict(pair, error=str(e))]
+                return pair_timer, [dict(pair, method=name, **json_result(name, result))
+                                    for name, result in results.items()]
+            return work
+
+        async def lines():
+            try:
+                async for pair_timer, pair_lines in compute_pool.as_completed(
+                        pair_work(pair, read) for pair, read in pairs):
+                    timer.add(pair_timer)
+                    for line in pair_lines:
+                        yield json.dumps(line) + "\n"
+            finally:
+                # The client went away or the batch is done: stop methods that have not started
+                cancel_event.set()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson",
+                                 headers={"X-Batch-Pairs": str(len(pairs))})
 
     except Exception as e:
         return JSONResponse(status_code=500, content={"error": str(e)})
 
 
+@app.websocket("/ws/stream")
+async def stream_flow(websocket: WebSocket, method: str, quality: str = DEFAULT_QUALITY, warm_start: bool = True):
+    """Flow over a live frame sequence.
+
+    The client sends each frame as an encoded image in a binary message and
+    receives, per frame, a JSON message with the flow statistics against
+    the previous frame, the latency and the throughput so far. Frames that
+    arrive while the compute pool is saturated are dropped and reported.
+    """
+    await websocket.accept()
+    if method not in ALL_METHODS or quality not in QUALITY_TIERS:
+        await websocket.close(code=1008, reason="Unknown method or quality")
+        return
+
+    stream = FlowStream(apply_quality({method: ALL_METHODS[method]}, quality)[method], warm_start=warm_start)
+    scale = get_quality_scale(quality)
+    index = 0
+    try:
+        while True:
+            data = await websocket.receive_bytes()
+
+            def work():
+                frame = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_GRAYSCALE)
+                if frame is None:
+                    return {"error": "Could not decode frame"}
+                result = stream.push(downscale_frame(frame, scale))
+                if result is None:
+                    return {"ready": True}
+                u, v = resize_flow(*result["flow"], frame.shape[:2])
+                message = {
+                    "latency": round(result["latency"], 4),
+                    "statistics": calculate_flow_statistics(u, v),
+                    "throughput": stream.stats()
+                }
+                if result["method_info"]:
+                    message["method_info"] = result["method_info"]
+                return message
+
+            try:
+                message = await compute_pool.run(work)
+            except PoolSaturated:
+                message = {"error": "Server busy", "dropped": True}
+            await websocket.send_json(dict(message, frame=index))
+            index += 1
+    except WebSocketDisconnect:
+        pass
+
+
 @app.get("/available-methods")
 async def get_available_methods():
     """Get list of available methods categorized."""
     return JSONResponse(content={
         "custom_methods": list(CUSTOM_METHODS.keys()),
         "library_methods": list(LIBRARY_METHODS.keys()),
-        "all_methods": list(ALL_METHODS.keys())
+        "all_methods": list(ALL_METHODS.keys()),
+        "quality_tiers": list(QUALITY_TIERS.keys())
     })
+
+
+@app.get("/cache-stats")
+async def get_cache_stats():
+    """Size, hit rate and evictions of the shared flow result cache."""
+    return JSONResponse(content=flow_cache.stats())
+
+
+@app.get("/compute-stats")
+async def get_compute_stats():
+    """Limits and current load of the compute pool, and timed-out methods still running."""
+    return JSONResponse(content=dict(compute_pool.stats(), abandoned_methods=abandoned_stats()))
+
+
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms per endpoint, stage, method and image size, in the Prometheus text format."""
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4")
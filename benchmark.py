@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark every optical flow method over the bundled Middlebury sequences.
+
+Each method runs on each sequence after warm-up runs; the median and p95
+latency, throughput, peak memory and flow statistics are written as JSON
+and summarised in a table. With a baseline report, per-method changes in
+fastest-run latency are listed and the exit status is 1 if any method
+regressed by more than the threshold (both reports need at least three
+timed runs for that).
+
+Usage:
+    python benchmark.py --output baseline.json
+    python benchmark.py --baseline baseline.json --threshold 0.15
+    python benchmark.py --data eval-gray-twoframes/eval-data-gray --methods "Horn-Schunck (Custom)" --repeat 10
+"""
+
+import argparse
+import json
+import sys
+from utils.motion_methods import ALL_METHODS
+from utils.quality import QUALITY_TIERS, apply_quality, get_quality_scale, downscale_frame
+from utils.benchmark import (DEFAULT_DATA_DIR, DEFAULT_REGRESSION_THRESHOLD, load_sequences, run_benchmark,
+                             compare_to_baseline, format_table, format_changes, print_progress)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark optical flow methods on Middlebury sequences")
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Directory with one sub-directory per sequence")
+    parser.add_argument("--methods", nargs="+", choices=list(ALL_METHODS), help="Methods to run (default all)")
+    parser.add_argument("--sequences", nargs="+", help="Sequences to run (default all)")
+    parser.add_argument("--quality", default="full", choices=list(QUALITY_TIERS))
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed runs per method and sequence")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per method and sequence")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative slowdown counted as a regression (default 0.10)")
+    parser.add_argument("--quiet", action="store_true", help="Do not print progress")
+    args = parser.parse_args()
+    if args.repeat < 1:
+        parser.error("--repeat must be at least 1")
+    if args.warmup < 0:
+        parser.error("--warmup must not be negative")
+
+    sequences = load_sequences(args.data)
+    if args.sequences:
+        sequences = {name: frames for name, frames in sequences.items() if name in args.sequences}
+    if not sequences:
+        print(f"No sequences found in {args.data}", file=sys.stderr)
+        return 1
+
+    scale = get_quality_scale(args.quality)
+    sequences = {name: (downscale_frame(frame1, scale), downscale_frame(frame2, scale))
+                 for name, (frame1, frame2) in sequences.items()}
+    methods = {name: ALL_METHODS[name] for name in (args.methods or ALL_METHODS)}
+    methods = apply_quality(methods, args.quality)
+
+    report = run_benchmark(methods, sequences, args.warmup, args.repeat,
+                           progress=None if args.quiet else print_progress)
+    report["settings"].update(data=args.data, quality=args.quality)
+
+    print(format_table(report))
+
+    regressed = False
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        changes = compare_to_baseline(report, baseline, args.threshold)
+        report["baseline"] = {"path": args.baseline, "threshold": args.threshold, "changes": changes}
+        regressed = any(change["regression"] for change in changes)
+        print()
+        print(format_changes(changes, args.threshold))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Score the optical flow methods against synthetic ground truth.
+
+The first frame of each Middlebury sequence is warped with known flow
+fields (translation, rotation, zoom, piecewise-affine and large
+displacement); every method is scored by endpoint and angular error
+against the true flow and timed. Results are written as JSON and as
+speed/accuracy Pareto plots.
+
+Usage:
+    python evaluate_accuracy.py --plot pareto.png --output accuracy.json
+    python evaluate_accuracy.py --sequences Army Urban --motions rotation zoom --max-epe 0.5
+"""
+
+import argparse
+import json
+import sys
+from utils.motion_methods import ALL_METHODS
+from utils.quality import QUALITY_TIERS, apply_quality, get_quality_scale, downscale_frame
+from utils.benchmark import DEFAULT_DATA_DIR, load_sequences
+from utils.synthetic import SYNTHETIC_MOTIONS, evaluate_accuracy, cheapest_within, pareto_front, plot_pareto
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Accuracy vs speed of optical flow methods on synthetic motion")
+    parser.add_argument("--data", default=DEFAULT_DATA_DIR, help="Directory with one sub-directory per sequence")
+    parser.add_argument("--sequences", nargs="+", help="Sequences whose first frame is warped (default all)")
+    parser.add_argument("--motions", nargs="+", default=list(SYNTHETIC_MOTIONS), choices=list(SYNTHETIC_MOTIONS))
+    parser.add_argument("--methods", nargs="+", choices=list(ALL_METHODS), help="Methods to score (default all)")
+    parser.add_argument("--quality", default="full", choices=list(QUALITY_TIERS))
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--plot", help="Write the Pareto plots (PNG) here")
+    parser.add_argument("--max-epe", type=float, help="Report the fastest method with at most this mean endpoint error")
+    parser.add_argument("--quiet", action="store_true", help="Do not print progress")
+    args = parser.parse_args()
+
+    sequences = load_sequences(args.data)
+    if args.sequences:
+        sequences = {name: frames for name, frames in sequences.items() if name in args.sequences}
+    if not sequences:
+        print(f"No sequences found in {args.data}", file=sys.stderr)
+        return 1
+
+    scale = get_quality_scale(args.quality)
+    frames = {name: downscale_frame(frame1, scale) for name, (frame1, _) in sequences.items()}
+    methods = apply_quality({name: ALL_METHODS[name] for name in (args.methods or ALL_METHODS)}, args.quality)
+
+    def progress(frame_name, motion):
+        if not args.quiet:
+            print(f"  {frame_name}: {motion}", file=sys.stderr)
+
+    report = evaluate_accuracy(methods, frames, args.motions, progress)
+
+    front = pareto_front({name: (r["summary"]["execution_time"], r["summary"]["endpoint_error"])
+                          for name, r in report.items() if "summary" in r})
+    print(f"{'Method':<40} {'time s':>8} {'EPE':>8} {'AE deg':>8}")
+    for name, r in sorted(report.items(), key=lambda item: item[1].get("summary", {}).get("execution_time", 1e9)):
+        if "summary" not in r:
+            print(f"{name:<40} failed")
+            continue
+        summary = r["summary"]
+        marker = "  *" if name in front else ""
+        print(f"{name:<40} {summary['execution_time']:>8.4f} {summary['endpoint_error']:>8.3f} "
+              f"{summary['angular_error']:>8.2f}{marker}")
+    print("\n* on the speed/accuracy Pareto front")
+
+    if args.max_epe is not None:
+        choice = cheapest_within(report, args.max_epe)
+        print(f"Fastest method with mean EPE <= {args.max_epe}: {choice or 'none'}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"settings": {"data": args.data, "sequences": list(frames), "motions": args.motions,
+                                    "quality": args.quality},
+                       "pareto_front": front, "methods": report}, f, indent=2)
+    if args.plot:
+        plot_pareto(report, args.motions, args.plot)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
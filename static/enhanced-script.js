@@ -19,6 +19,7 @@
         // Method selection
         methodSelect: document.getElementById('methodSelect'),
         methodCheckboxes: document.getElementById('methodCheckboxes'),
+        qualitySelect: document.getElementById('qualitySelect'),
 
         // Buttons
         analyzeBtn: document.getElementById('analyzeBtn'),
@@ -49,6 +50,7 @@
     // State
     let availableMethods = {};
     let currentChartInstance = null;
+    let currentPairId = null;
 
     // Initialize
     init();
@@ -205,6 +207,7 @@
 
             // Store in localStorage
             localStorage.setItem(imageId, e.target.result);
+            forgetPair();
 
             // Display preview
             displayImagePreview(containerId, e.target.result);
@@ -277,30 +280,24 @@
         try {
             showLoading(true);
 
-            const formData = new FormData();
-            formData.append('image1', dataURItoBlob(localStorage.getItem('image1')), 'image1.png');
-            formData.append('image2', dataURItoBlob(localStorage.getItem('image2')), 'image2.png');
-            formData.append('method_name', methodName);
-
-            const response = await fetch('/single-method', {
-                method: 'POST',
-                body: formData
+            // One request runs the method once and returns metrics plus the rendered image URL
+            const response = await postWithPair('/analyze-single', {
+                method_name: methodName,
+                quality: elements.qualitySelect.value
             });
 
+            const data = await response.json();
             if (!response.ok) {
-                const errorData = await response.json();
-                throw new Error(errorData.error || 'Analysis failed');
+                throw new Error(data.error || 'Analysis failed');
             }
 
-            const imageBlob = await response.blob();
-            const imageUrl = URL.createObjectURL(imageBlob);
-
             // Display result
-            elements.resultImage.src = imageUrl;
+            elements.resultImage.src = data.image_url;
             showSingleResult();
 
-            // Get metrics (separate call needed)
-            await getSingleMethodMetrics(methodName);
+            if (data.result && data.result.success) {
+                displaySingleMethodMetrics(data.result);
+            }
 
             showToast('Analysis completed successfully', 'success');
 
@@ -312,30 +309,6 @@
         }
     }
 
-    async function getSingleMethodMetrics(methodName) {
-        try {
-            const formData = new FormData();
-            formData.append('image1', dataURItoBlob(localStorage.getItem('image1')), 'image1.png');
-            formData.append('image2', dataURItoBlob(localStorage.getItem('image2')), 'image2.png');
-            formData.append('method_name', methodName);
-
-            const response = await fetch('/single-method-metrics', {
-                method: 'POST',
-                body: formData
-            });
-
-            if (response.ok) {
-                const methodResult = await response.json();
-
-                if (methodResult && methodResult.success) {
-                    displaySingleMethodMetrics(methodResult);
-                }
-            }
-        } catch (error) {
-            console.error('Error getting metrics:', error);
-        }
-    }
-
     function displaySingleMethodMetrics(result) {
         elements.executionTime.textContent = result.execution_time + 's';
         elements.meanMagnitude.textContent = result.statistics.mean_magnitude?.toFixed(2) || '-';
@@ -351,54 +324,23 @@
         try {
             showLoading(true);
 
-            const formData = new FormData();
-            formData.append('image1', dataURItoBlob(localStorage.getItem('image1')), 'image1.png');
-            formData.append('image2', dataURItoBlob(localStorage.getItem('image2')), 'image2.png');
-
-            // Get comparison data
-            const metricsResponse = await fetch('/compare-methods', {
-                method: 'POST',
-                body: formData
-            });
-
-            if (!metricsResponse.ok) {
-                throw new Error('Failed to get comparison metrics');
-            }
-
-            const allResults = await metricsResponse.json();
-
-            // Filter results to only include selected methods
-            const filteredResults = {};
-            selectedMethods.forEach(method => {
-                if (allResults[method]) {
-                    filteredResults[method] = allResults[method];
-                }
+            // One request runs the selected methods once and returns metrics plus the grid image URL
+            const response = await postWithPair('/analyze-comparison', {
+                selected_methods: JSON.stringify(selectedMethods),
+                quality: elements.qualitySelect.value
             });
 
-            // Get visualization
-            const vizFormData = new FormData();
-            vizFormData.append('image1', dataURItoBlob(localStorage.getItem('image1')), 'image1.png');
-            vizFormData.append('image2', dataURItoBlob(localStorage.getItem('image2')), 'image2.png');
-            vizFormData.append('selected_methods', JSON.stringify(selectedMethods));
-
-            const vizResponse = await fetch('/visualize-comparison', {
-                method: 'POST',
-                body: vizFormData
-            });
-
-            if (!vizResponse.ok) {
-                throw new Error('Failed to generate comparison visualization');
+            const data = await response.json();
+            if (!response.ok) {
+                throw new Error(data.error || 'Comparison failed');
             }
 
-            const imageBlob = await vizResponse.blob();
-            const imageUrl = URL.createObjectURL(imageBlob);
-
             // Display results
-            elements.comparisonImage.src = imageUrl;
+            elements.comparisonImage.src = data.image_url;
             showComparisonResult();
 
             // Display metrics
-            displayComparisonMetrics(filteredResults);
+            displayComparisonMetrics(data.results);
 
             showToast('Comparison completed successfully', 'success');
 
@@ -564,6 +506,7 @@
         // Clear localStorage
         localStorage.removeItem('image1');
         localStorage.removeItem('image2');
+        forgetPair();
 
         // Clear file inputs
         elements.image1.value = '';
@@ -598,6 +541,54 @@
         localStorage.removeItem('image2');
     }
 
+    // Frame pair session: upload and decode the images once, then refer to them by id
+    async function ensurePair() {
+        if (currentPairId) return currentPairId;
+
+        const formData = new FormData();
+        formData.append('image1', dataURItoBlob(localStorage.getItem('image1')), 'image1.png');
+        formData.append('image2', dataURItoBlob(localStorage.getItem('image2')), 'image2.png');
+
+        const response = await fetch('/pairs', {
+            method: 'POST',
+            body: formData
+        });
+
+        if (!response.ok) {
+            const errorData = await response.json();
+            throw new Error(errorData.error || 'Upload failed');
+        }
+
+        currentPairId = (await response.json()).pair_id;
+        return currentPairId;
+    }
+
+    function forgetPair() {
+        if (currentPairId) {
+            fetch(`/pairs/${currentPairId}`, { method: 'DELETE' }).catch(() => {});
+            currentPairId = null;
+        }
+    }
+
+    async function postWithPair(url, fields) {
+        let response;
+        for (let attempt = 0; attempt < 2; attempt++) {
+            const formData = new FormData();
+            formData.append('pair_id', await ensurePair());
+            Object.entries(fields).forEach(([key, value]) => formData.append(key, value));
+
+            response = await fetch(url, {
+                method: 'POST',
+                body: formData
+            });
+
+            // The server drops pairs after a TTL or under memory pressure; upload again once
+            if (response.status !== 404) break;
+            currentPairId = null;
+        }
+        return response;
+    }
+
     // Utility functions
     function dataURItoBlob(dataURI) {
         const byteString = atob(dataURI.split(',')[1]);
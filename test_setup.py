@@ -54,13 +54,24 @@ def test_opencv_methods():
             cv2, 'calcOpticalFlowFarneback'), "Farneback method not available"
         print("✓ Farneback optical flow")
 
-        # Test contrib methods (requires opencv-contrib-python)
+        assert hasattr(
+            cv2, 'DISOpticalFlow_create'), "DIS method not available"
+        cv2.DISOpticalFlow_create(cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST)
+        print("✓ DIS optical flow")
+
+        # TV-L1 comes from scikit-image; the contrib version is optional
+        try:
+            from skimage.registration import optical_flow_tvl1
+            print("✓ TV-L1 optical flow (scikit-image)")
+        except ImportError:
+            print("✗ TV-L1 optical flow (scikit-image) - upgrade scikit-image")
+            return False
+
         try:
             cv2.optflow.DualTVL1OpticalFlow_create()
             print("✓ TV-L1 optical flow (contrib)")
         except AttributeError:
-            print("✗ TV-L1 optical flow (contrib) - install opencv-contrib-python")
-            return False
+            print("- TV-L1 optical flow (contrib) not installed, optional")
 
         return True
 
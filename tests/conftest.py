@@ -0,0 +1,28 @@
+import os
+import cv2
+import pytest
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "eval-gray-twoframes", "eval-data-gray", "Urban")
+
+
+@pytest.fixture(scope="session")
+def urban_pair():
+    """The Urban frame pair in grayscale."""
+    frame1 = cv2.imread(os.path.join(DATA_DIR, "frame10.png"), cv2.IMREAD_GRAYSCALE)
+    frame2 = cv2.imread(os.path.join(DATA_DIR, "frame11.png"), cv2.IMREAD_GRAYSCALE)
+    return frame1, frame2
+
+
+@pytest.fixture(scope="session")
+def small_pair(urban_pair):
+    """A textured 64x96 crop of the Urban pair, small enough for per-pixel reference loops."""
+    frame1, frame2 = urban_pair
+    return frame1[200:264, 300:396].copy(), frame2[200:264, 300:396].copy()
+
+
+@pytest.fixture(scope="session")
+def shifted_pair(urban_pair):
+    """A 96x128 crop of Urban and the same crop moved by (dx, dy) = (3, -2)."""
+    frame1 = urban_pair[0]
+    return frame1[200:296, 300:428].copy(), frame1[202:298, 297:425].copy()
@@ -0,0 +1,127 @@
+import io
+import json
+import threading
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import app as app_module
+from app import app, pair_loader
+from utils.timing import StageTimer
+from utils.compute_pool import ComputePool, PoolSaturated
+from utils.flow_io import decode_flow
+
+
+@pytest.fixture(scope="module")
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def uploads(small_pair):
+    """The small crop pair encoded as PNG uploads."""
+    encoded = [cv2.imencode(".png", frame)[1].tobytes() for frame in small_pair]
+    return {"image1": ("frame1.png", encoded[0], "image/png"), "image2": ("frame2.png", encoded[1], "image/png")}
+
+
+def test_analyze_single_returns_metrics_and_artifact(client, uploads):
+    response = client.post("/analyze-single", files=uploads, data={"method_name": "Farneback (OpenCV)"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"]["success"] and "statistics" in body["result"]
+    assert "compute" in body["timings"]
+    image = client.get(body["image_url"])
+    assert image.status_code == 200 and image.headers["content-type"] == "image/png"
+
+
+def test_analyze_comparison_returns_metrics_and_artifact(client, uploads):
+    methods = ["Farneback (OpenCV)", "Lucas-Kanade Dense (Custom)"]
+    response = client.post("/analyze-comparison", files=uploads, data={"selected_methods": json.dumps(methods)})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["results"]) == set(methods)
+    assert "comparison_metrics" in body["results"]["Lucas-Kanade Dense (Custom)"]
+    assert client.get(body["image_url"]).status_code == 200
+
+
+def test_analyze_rejects_bad_input(client, uploads):
+    assert client.post("/analyze-single", files=uploads, data={"method_name": "Nope"}).status_code == 400
+    assert client.post("/analyze-single", data={"method_name": "Farneback (OpenCV)"}).status_code == 400
+    assert client.get("/artifacts/unknown").status_code == 404
+
+
+def test_compare_methods_runs_every_method(client, uploads):
+    response = client.post("/compare-methods", files=uploads, data={"quality": "preview"})
+    assert response.status_code == 200
+    results = response.json()
+    assert set(results) == set(app_module.ALL_METHODS)
+    succeeded = [name for name, result in results.items() if result["success"]]
+    assert len(succeeded) > 1
+    assert all("pairwise_metrics" in results[name] for name in succeeded)
+    assert "Server-Timing" in response.headers
+
+
+def test_saturated_pool_answers_503(client, uploads, monkeypatch):
+    pool = ComputePool(max_workers=1, max_queue=0)
+    release = threading.Event()
+    pool.submit(release.wait)
+    monkeypatch.setattr(app_module, "compute_pool", pool)
+    try:
+        with pytest.raises(PoolSaturated):
+            pool.submit(lambda: None)
+        response = client.post("/compare-methods", files=uploads)
+        assert response.status_code == 503 and "Retry-After" in response.headers
+        assert pool.stats()["rejected"] == 2
+    finally:
+        release.set()
+
+
+def test_export_flow_takes_the_format_field(client, uploads):
+    data = {"method_name": "Farneback (OpenCV)", "format": "int16", "compress": "true"}
+    response = client.post("/export-flow", files=uploads, data=data)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"].endswith('flow.qflo.zz"')
+    u, v = decode_flow(response.content)
+    assert u.shape == (64, 96)
+    data["format"] = "bmp"
+    assert client.post("/export-flow", files=uploads, data=data).status_code == 400
+
+
+def test_batch_metrics_carry_a_size_and_cover_the_stream(client, uploads):
+    files = [("images", uploads["image1"]), ("images", uploads["image2"])]
+    response = client.post("/batch", files=files, data={"selected_methods": json.dumps(["Farneback (OpenCV)"])})
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[0]["method"] == "Farneback (OpenCV)" and lines[0]["success"]
+    metrics = client.get("/metrics").text
+    assert 'flow_request_duration_seconds_count{endpoint="/batch",status="200",size="0-0.1MP"}' in metrics
+    assert 'flow_stage_duration_seconds_count{endpoint="/batch",stage="compute",size="0-0.1MP"}' in metrics
+
+
+def rotated_jpeg(frame):
+    """``frame`` as a JPEG whose EXIF orientation (6) rotates it by 90 degrees on display."""
+    from PIL import Image
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    buffer = io.BytesIO()
+    Image.fromarray(frame).save(buffer, "JPEG", exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("size", [(300, 400), (301, 401)])
+def test_reduced_decode_keeps_exif_orientation(size):
+    frame = (np.random.default_rng(0).random(size) * 255).astype(np.uint8)
+    data = rotated_jpeg(frame)
+    full = pair_loader(lambda: (data, data), "full")(StageTimer())
+    preview = pair_loader(lambda: (data, data), "preview")(StageTimer())
+    assert full[0].shape == size[::-1]
+    assert preview[2] == 2 and preview[3] == full[3] == size[::-1]
+
+
+def test_preview_flow_of_rotated_jpeg_has_the_full_shape(client):
+    data = rotated_jpeg((np.random.default_rng(1).random((300, 400)) * 255).astype(np.uint8))
+    files = {"image1": ("a.jpg", data, "image/jpeg"), "image2": ("b.jpg", data, "image/jpeg")}
+    response = client.post("/export-flow", files=files,
+                           data={"method_name": "Farneback (OpenCV)", "quality": "preview"})
+    assert response.status_code == 200
+    assert decode_flow(response.content)[0].shape == (400, 300)
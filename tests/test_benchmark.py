@@ -0,0 +1,39 @@
+import pytest
+from utils.benchmark import MIN_REGRESSION_REPEAT, benchmark_method, compare_to_baseline, run_benchmark
+from utils.motion_methods import farneback_opencv
+
+
+def report(repeat, **fastest):
+    """A benchmark report with one sequence per method and the given fastest-run times."""
+    return {
+        "settings": {"repeat": repeat},
+        "methods": {name: {"sequences": {"Urban": {"min": seconds, "median": seconds * 3}}}
+                    for name, seconds in fastest.items()}
+    }
+
+
+def test_regressions_compare_fastest_runs():
+    changes = compare_to_baseline(report(5, a=1.2, b=1.05), report(5, a=1.0, b=1.0), threshold=0.1)
+    by_method = {change["method"]: change for change in changes}
+    assert by_method["a"]["regression"] and by_method["a"]["change"] == 0.2
+    assert not by_method["b"]["regression"]
+
+
+def test_too_few_repeats_never_fail():
+    few = MIN_REGRESSION_REPEAT - 1
+    changes = compare_to_baseline(report(few, a=2.0), report(5, a=1.0), threshold=0.1)
+    assert changes[0]["change"] == 1.0
+    assert not changes[0]["regression"] and not changes[0]["conclusive"]
+
+
+@pytest.mark.parametrize("warmup, repeat", [(1, 0), (-1, 3)])
+def test_run_counts_that_time_nothing_are_rejected(small_pair, warmup, repeat):
+    with pytest.raises(ValueError):
+        benchmark_method(farneback_opencv, *small_pair, warmup=warmup, repeat=repeat)
+    with pytest.raises(ValueError):
+        run_benchmark({"Farneback (OpenCV)": farneback_opencv}, {"crop": small_pair}, warmup, repeat)
+
+
+def test_single_run_is_timed(small_pair):
+    result = benchmark_method(farneback_opencv, *small_pair, warmup=0, repeat=1)
+    assert result["median"] == result["min"] > 0
@@ -0,0 +1,97 @@
+import time
+import numpy as np
+import pytest
+import utils.evaluation_metrics as evaluation_metrics
+from utils.evaluation_metrics import (compare_methods, abandoned_stats, pairwise_flow_metrics, calculate_mse,
+                                      calculate_mae, calculate_endpoint_error, calculate_angular_error,
+                                      calculate_flow_statistics)
+from utils.motion_methods import diamond_block_matching_custom
+
+
+def test_block_search_stops_at_the_deadline(urban_pair):
+    info = {}
+    diamond_block_matching_custom(*urban_pair, info=info, deadline=time.perf_counter())
+    assert info["truncated"] and info["truncated_at_block_row"] == 0
+
+
+def test_timed_out_methods_are_reported_until_they_return():
+    def slow(im1, im2):
+        time.sleep(0.5)
+        return np.zeros(im1.shape, np.float32), np.zeros(im1.shape, np.float32)
+
+    frame = np.zeros((32, 32), np.uint8)
+    total = abandoned_stats()["total"]
+    results = compare_methods(frame, frame, {"slow": slow}, timeout=0.1)
+    assert not results["slow"]["success"]
+    stats = abandoned_stats()
+    assert stats["total"] == total + 1 and stats["running"].get("slow") == 1
+    time.sleep(0.6)
+    assert "slow" not in abandoned_stats()["running"]
+
+
+METRIC_FUNCTIONS = {
+    "mse": calculate_mse,
+    "mae": calculate_mae,
+    "endpoint_error": calculate_endpoint_error,
+    "angular_error": calculate_angular_error,
+}
+
+
+@pytest.fixture
+def flow_stack():
+    rng = np.random.default_rng(1)
+    flows = rng.normal(0, 3, (4, 2, 41, 67)).astype(np.float32)
+    flows[2, :, :10] = 0  # zero vectors are left out of the angular error
+    return flows
+
+
+@pytest.mark.parametrize("chunk", [1 << 20, 500])
+def test_pairwise_metrics_match_single_metrics(flow_stack, monkeypatch, chunk):
+    monkeypatch.setattr(evaluation_metrics, "METRICS_CHUNK_ELEMENTS", chunk)
+    matrices = pairwise_flow_metrics(flow_stack)
+    n = len(flow_stack)
+    for name, metric in METRIC_FUNCTIONS.items():
+        assert matrices[name].shape == (n, n)
+        for i in range(n):
+            assert matrices[name][i, i] == 0
+            for j in range(n):
+                if i != j:
+                    expected = metric(flow_stack[i, 0], flow_stack[i, 1], flow_stack[j, 0], flow_stack[j, 1])
+                    assert matrices[name][i, j] == pytest.approx(float(expected), rel=1e-4)
+
+
+def test_chunked_statistics_match_numpy(flow_stack, monkeypatch):
+    monkeypatch.setattr(evaluation_metrics, "METRICS_CHUNK_ELEMENTS", 500)
+    u, v = flow_stack[0]
+    magnitude = np.sqrt(u.astype(np.float64) ** 2 + v.astype(np.float64) ** 2)
+    statistics = calculate_flow_statistics(u, v)
+    assert statistics["mean_magnitude"] == pytest.approx(magnitude.mean(), rel=1e-5)
+    assert statistics["max_magnitude"] == pytest.approx(magnitude.max(), rel=1e-5)
+    assert statistics["std_magnitude"] == pytest.approx(magnitude.std(), rel=1e-4)
+    assert statistics["std_u"] == pytest.approx(u.std(dtype=np.float64), rel=1e-4)
+    assert statistics["mean_v"] == pytest.approx(v.mean(dtype=np.float64), rel=1e-4, abs=1e-6)
+
+
+@pytest.mark.parametrize("offset", [100.3, 25.7, 3.1])
+def test_statistics_of_a_constant_offset_field_have_no_spread(monkeypatch, offset):
+    monkeypatch.setattr(evaluation_metrics, "METRICS_CHUNK_ELEMENTS", 5000)
+    u = np.full((120, 160), offset, np.float32)
+    v = np.full((120, 160), -offset / 2, np.float32)
+    statistics = calculate_flow_statistics(u, v)
+    assert statistics["std_u"] == pytest.approx(0, abs=1e-9)
+    assert statistics["std_v"] == pytest.approx(0, abs=1e-9)
+    assert statistics["std_magnitude"] == pytest.approx(0, abs=1e-9)
+    assert statistics["mean_u"] == pytest.approx(offset, rel=1e-6)
+
+
+def test_compare_methods_adds_pairwise_and_reference_metrics(small_pair):
+    def still(im1, im2):
+        return np.zeros(im1.shape, np.float32), np.zeros(im1.shape, np.float32)
+
+    def drift(im1, im2):
+        return np.ones(im1.shape, np.float32), np.zeros(im1.shape, np.float32)
+
+    results = compare_methods(*small_pair, {"still": still, "drift": drift}, executor="serial")
+    assert "comparison_metrics" not in results["still"]
+    assert results["drift"]["comparison_metrics"]["endpoint_error"] == pytest.approx(1.0)
+    assert results["still"]["pairwise_metrics"]["drift"]["mse"] == pytest.approx(0.5)
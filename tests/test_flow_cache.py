@@ -0,0 +1,55 @@
+import functools
+import numpy as np
+from utils.flow_cache import FlowCache, frame_pair_digest, method_signature
+from utils.evaluation_metrics import compare_methods
+from utils.motion_methods import farneback_opencv
+
+
+def entry(nbytes):
+    """A cached result whose flow arrays hold ``nbytes`` bytes."""
+    flow = np.zeros(nbytes // 8, np.float32)
+    return {"flow_vectors": (flow, flow)}
+
+
+def test_lru_eviction_keeps_recently_used_entries():
+    cache = FlowCache(3000)
+    for key in "abc":
+        cache.put(key, entry(1000))
+    assert cache.get("a") is not None
+    cache.put("d", entry(1000))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.stats()["evictions"] == 1
+
+
+def test_byte_budget():
+    cache = FlowCache(2500)
+    cache.put("a", entry(1000))
+    cache.put("b", entry(1000))
+    cache.put("a", entry(2000))
+    assert cache.bytes == 2000 and cache.bytes <= cache.max_bytes
+    assert cache.get("b") is None
+    cache.put("huge", entry(4000))
+    assert cache.get("huge") is None and cache.get("a") is not None
+    cache.clear()
+    assert cache.stats()["entries"] == 0 and cache.bytes == 0
+
+
+def test_keys_depend_on_content_and_parameters():
+    frame = np.zeros((8, 8), np.uint8)
+    other = frame.copy()
+    other[0, 0] = 1
+    assert frame_pair_digest(frame, frame) == frame_pair_digest(frame.copy(), frame.copy())
+    assert frame_pair_digest(frame, frame) != frame_pair_digest(frame, other)
+    assert method_signature(functools.partial(farneback_opencv, levels=2)) != \
+        method_signature(functools.partial(farneback_opencv, levels=3))
+
+
+def test_compare_methods_reuses_cached_results(small_pair):
+    cache = FlowCache(1 << 20)
+    methods = {"Farneback (OpenCV)": farneback_opencv}
+    first = compare_methods(*small_pair, methods, cache=cache)
+    second = compare_methods(*small_pair, methods, cache=cache)
+    assert second["Farneback (OpenCV)"].get("cached")
+    np.testing.assert_array_equal(first["Farneback (OpenCV)"]["flow_vectors"][0],
+                                  second["Farneback (OpenCV)"]["flow_vectors"][0])
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+from utils.flow_io import FLOW_FORMATS, encode_flow, decode_flow, save_flow, load_flow, load_quantized_flow
+
+
+@pytest.fixture
+def flow():
+    rng = np.random.default_rng(0)
+    return (rng.uniform(-20, 20, (37, 53)).astype(np.float32),
+            rng.uniform(-5, 5, (37, 53)).astype(np.float32))
+
+
+# Worst-case error per format: exact float32, float16 rounding at |20|, half a quantization step
+TOLERANCE = {"flo": 0.0, "float16": 0.01, "int16": 20 / 32767}
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("fmt", FLOW_FORMATS)
+def test_save_load_round_trip(tmp_path, flow, fmt, compress):
+    path = tmp_path / f"flow.{fmt}"
+    save_flow(str(path), *flow, fmt=fmt, compress=compress)
+    u, v = load_flow(str(path))
+    assert u.shape == v.shape == flow[0].shape
+    np.testing.assert_allclose(u, flow[0], atol=TOLERANCE[fmt])
+    np.testing.assert_allclose(v, flow[1], atol=TOLERANCE[fmt])
+
+
+@pytest.mark.parametrize("compress", [False, True])
+@pytest.mark.parametrize("fmt", FLOW_FORMATS)
+def test_encode_decode_round_trip(flow, fmt, compress):
+    u, v = decode_flow(encode_flow(*flow, fmt=fmt, compress=compress))
+    np.testing.assert_allclose(u, flow[0], atol=TOLERANCE[fmt])
+    np.testing.assert_allclose(v, flow[1], atol=TOLERANCE[fmt])
+
+
+def test_quantized_file_stays_mapped(tmp_path, flow):
+    path = str(tmp_path / "flow.qflo")
+    save_flow(path, *flow, fmt="int16", scale=0.01)
+    u, v, scale = load_quantized_flow(path)
+    assert u.dtype == np.int16 and scale == pytest.approx(0.01)
+    np.testing.assert_allclose(u * scale, flow[0], atol=0.005 + 1e-6)
+
+
+def test_unknown_format_is_rejected(flow):
+    with pytest.raises(ValueError):
+        encode_flow(*flow, fmt="png")
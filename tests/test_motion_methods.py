@@ -0,0 +1,190 @@
+import cv2
+import numpy as np
+import pytest
+from scipy.signal import convolve2d
+from utils.motion_methods import (lucas_kanade_dense_custom, horn_schunck_custom, horn_schunck_multigrid_custom,
+                                  ssd_block_matching_custom, _block_cost_volume, _block_grid, densify_sparse_flow)
+
+
+def lucas_kanade_loop(im1, im2, window_size=5):
+    """The original per-pixel least-squares Lucas-Kanade."""
+    im1 = im1.astype(np.float32)
+    im2 = im2.astype(np.float32)
+    Ix = cv2.Sobel(im1, cv2.CV_32F, 1, 0, ksize=3) + cv2.Sobel(im2, cv2.CV_32F, 1, 0, ksize=3)
+    Iy = cv2.Sobel(im1, cv2.CV_32F, 0, 1, ksize=3) + cv2.Sobel(im2, cv2.CV_32F, 0, 1, ksize=3)
+    It = im2 - im1
+    half_w = window_size // 2
+    u = np.zeros(im1.shape, dtype=np.float32)
+    v = np.zeros(im1.shape, dtype=np.float32)
+    h, w = im1.shape
+    for y in range(half_w, h - half_w):
+        for x in range(half_w, w - half_w):
+            window = np.s_[y - half_w:y + half_w + 1, x - half_w:x + half_w + 1]
+            A = np.stack((Ix[window].ravel(), Iy[window].ravel()), axis=1)
+            nu, _, _, _ = np.linalg.lstsq(A, -It[window].ravel(), rcond=None)
+            u[y, x], v[y, x] = nu
+    return u, v
+
+
+def test_lucas_kanade_matches_loop(small_pair):
+    for window_size in (5, 9):
+        u, v = lucas_kanade_dense_custom(*small_pair, window_size=window_size)
+        u_ref, v_ref = lucas_kanade_loop(*small_pair, window_size=window_size)
+        np.testing.assert_allclose(u, u_ref, atol=1e-3)
+        np.testing.assert_allclose(v, v_ref, atol=1e-3)
+
+
+def horn_schunck_loop(im1, im2, alpha=1.0, num_iter=100):
+    """The original Horn-Schunck iteration with scipy convolutions."""
+    im1 = im1.astype(np.float32)
+    im2 = im2.astype(np.float32)
+    kernel_x = np.array([[-1, 1], [-1, 1]]) * 0.25
+    kernel_y = np.array([[-1, -1], [1, 1]]) * 0.25
+    kernel_t = np.ones((2, 2)) * 0.25
+    kernel_avg = np.array([[0, 0.25, 0], [0.25, 0, 0.25], [0, 0.25, 0]])
+
+    def conv(a, kernel):
+        return convolve2d(a, kernel, boundary='symm', mode='same')
+
+    Ix = conv(im1, kernel_x) + conv(im2, kernel_x)
+    Iy = conv(im1, kernel_y) + conv(im2, kernel_y)
+    It = conv(im2, kernel_t) - conv(im1, kernel_t)
+    u = np.zeros_like(im1)
+    v = np.zeros_like(im1)
+    for _ in range(num_iter):
+        u_avg = conv(u, kernel_avg)
+        v_avg = conv(v, kernel_avg)
+        term = (Ix * u_avg + Iy * v_avg + It) / (alpha ** 2 + Ix ** 2 + Iy ** 2)
+        u = u_avg - Ix * term
+        v = v_avg - Iy * term
+    return u, v
+
+
+def test_horn_schunck_matches_loop(small_pair):
+    u, v = horn_schunck_custom(*small_pair, alpha=1.0, num_iter=50)
+    u_ref, v_ref = horn_schunck_loop(*small_pair, alpha=1.0, num_iter=50)
+    np.testing.assert_allclose(u, u_ref, atol=1e-3)
+    np.testing.assert_allclose(v, v_ref, atol=1e-3)
+
+
+def test_horn_schunck_tolerance_stops_early(small_pair):
+    info = {}
+    horn_schunck_custom(*small_pair, num_iter=2000, tol=1e-3, info=info)
+    assert info["iterations"] < 2000
+    assert info["residual"] < 1e-3
+
+
+def test_horn_schunck_multigrid_reports_levels(small_pair):
+    info = {}
+    u, v = horn_schunck_multigrid_custom(*small_pair, num_levels=3, info=info)
+    assert u.shape == small_pair[0].shape
+    assert len(info["level_iterations"]) == 3
+    assert info["iterations"] == sum(info["level_iterations"])
+
+
+@pytest.mark.parametrize("shape, levels", [((15, 40), 1), ((30, 40), 1), ((31, 40), 2), ((64, 96), 3), ((130, 200), 4)])
+def test_horn_schunck_multigrid_stops_above_16_pixels(shape, levels):
+    frame = (np.random.default_rng(0).random(shape) * 255).astype(np.uint8)
+    info = {}
+    horn_schunck_multigrid_custom(frame, frame, num_levels=4, num_iter=2, info=info)
+    assert len(info["level_iterations"]) == levels
+
+
+def block_cost(block, candidate, cost):
+    """Matching cost of one block against one candidate, as stored in the cost volume."""
+    if cost == "ssd":
+        return np.sum((block - candidate) ** 2)
+    if cost == "sad":
+        return np.sum(np.abs(block - candidate))
+    a, b = block - block.mean(), candidate - candidate.mean()
+    return 1.0 - np.sum(a * b) / np.sqrt(np.sum(a * a) * np.sum(b * b))
+
+
+@pytest.mark.parametrize("cost", ["ssd", "sad", "ncc"])
+def test_block_cost_volume_matches_direct_sums(shifted_pair, cost):
+    f1, f2 = [f.astype(np.float32) for f in shifted_pair]
+    block_size, r = 16, 4
+    costs = _block_cost_volume(f1, f2, block_size, r, cost)
+    h, w = f1.shape
+    ys, xs = _block_grid((h, w), block_size)
+    for by, y in enumerate(ys):
+        for bx, x in enumerate(xs):
+            block = f1[y:y + block_size, x:x + block_size]
+            for dy in range(-r, r + 1):
+                for dx in range(-r, r + 1):
+                    ny, nx = y + dy, x + dx
+                    stored = costs[dy + r, dx + r, by, bx]
+                    if 0 <= ny < h - block_size and 0 <= nx < w - block_size:
+                        expected = block_cost(block, f2[ny:ny + block_size, nx:nx + block_size], cost)
+                        assert stored == pytest.approx(expected, rel=1e-3, abs=1e-2)
+                    else:
+                        assert np.isinf(stored)
+
+
+def block_matching_loop(frame1, frame2, block_size=16, search_range=4):
+    """The original per-block exhaustive SSD search, on float frames."""
+    frame1 = frame1.astype(np.float32)
+    frame2 = frame2.astype(np.float32)
+    h, w = frame1.shape
+    u = np.zeros((h // block_size, w // block_size), dtype=np.float32)
+    v = np.zeros((h // block_size, w // block_size), dtype=np.float32)
+    for y in range(0, h - block_size, block_size):
+        for x in range(0, w - block_size, block_size):
+            best_score, best = float('inf'), (0, 0)
+            block = frame1[y:y + block_size, x:x + block_size]
+            for dy in range(-search_range, search_range + 1):
+                for dx in range(-search_range, search_range + 1):
+                    ny, nx = y + dy, x + dx
+                    if 0 <= ny < h - block_size and 0 <= nx < w - block_size:
+                        score = np.sum((block - frame2[ny:ny + block_size, nx:nx + block_size]) ** 2)
+                        if score < best_score:
+                            best_score, best = score, (dx, dy)
+            u[y // block_size, x // block_size], v[y // block_size, x // block_size] = best
+    return (cv2.resize(u, (w, h), interpolation=cv2.INTER_NEAREST),
+            cv2.resize(v, (w, h), interpolation=cv2.INTER_NEAREST))
+
+
+def test_exhaustive_block_matching_matches_loop(shifted_pair):
+    u, v = ssd_block_matching_custom(*shifted_pair, block_size=16, search_range=4)
+    u_ref, v_ref = block_matching_loop(*shifted_pair, block_size=16, search_range=4)
+    np.testing.assert_array_equal(u, u_ref)
+    np.testing.assert_array_equal(v, v_ref)
+    # The crop moved by (3, -2), so every block that can see its match finds it
+    assert np.median(u) == 3 and np.median(v) == -2
+
+
+def sparse_linear_field(seed=0):
+    rng = np.random.default_rng(seed)
+    points = rng.uniform(0, 99, (400, 2)).astype(np.float32)
+    return points, np.column_stack((0.1 * points[:, 0], -0.05 * points[:, 1])).astype(np.float32)
+
+
+@pytest.mark.parametrize("grid_step", [1, 4, 8])
+def test_densify_sparse_flow_reproduces_a_linear_field(grid_step):
+    points, vectors = sparse_linear_field()
+    u, v = densify_sparse_flow(points, vectors, (100, 100), interpolation="delaunay", grid_step=grid_step)
+    y, x = np.mgrid[30:70, 30:70]
+    np.testing.assert_allclose(u[30:70, 30:70], 0.1 * x, atol=1e-3)
+    np.testing.assert_allclose(v[30:70, 30:70], -0.05 * y, atol=1e-3)
+
+
+@pytest.mark.parametrize("grid_step", [4, 8])
+def test_densify_sparse_flow_coarse_grid_is_not_shifted(grid_step):
+    points, vectors = sparse_linear_field()
+    u, _ = densify_sparse_flow(points, vectors, (100, 100), interpolation="idw", grid_step=grid_step)
+    u_fine, _ = densify_sparse_flow(points, vectors, (100, 100), interpolation="idw", grid_step=1)
+    # A shift of (grid_step - 1) / 2 pixels would move this field by 0.15-0.35
+    assert abs(float(np.mean(u[30:70, 30:70] - u_fine[30:70, 30:70]))) < 0.02
+
+
+@pytest.mark.parametrize("points", [
+    [[10, 10], [20, 20], [30, 30], [40, 40]],  # along one edge
+    [[10, 10], [10, 10], [10, 10]],  # all at one spot
+])
+def test_densify_sparse_flow_survives_degenerate_points(points):
+    points = np.array(points, dtype=np.float32)
+    vectors = np.tile(np.array([[1.5, -0.5]], dtype=np.float32), (len(points), 1))
+    u, v = densify_sparse_flow(points, vectors, (50, 60), interpolation="delaunay")
+    assert u.shape == (50, 60)
+    np.testing.assert_allclose(u, 1.5, atol=1e-5)
+    np.testing.assert_allclose(v, -0.5, atol=1e-5)
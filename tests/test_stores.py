@@ -0,0 +1,68 @@
+import time
+import numpy as np
+import pytest
+from utils.pair_store import PairStore
+from utils.artifact_store import ArtifactStore
+
+
+class FakeClock:
+    """A stand-in for ``time.monotonic`` that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+def frames(nbytes=1000):
+    return np.zeros(nbytes // 2, np.uint8), np.zeros(nbytes // 2, np.uint8)
+
+
+def test_pair_expires_after_ttl_since_last_use(clock):
+    store = PairStore(ttl=10, max_bytes=10000)
+    pair_id = store.put(*frames())
+    clock.now += 8
+    assert store.get(pair_id) is not None
+    clock.now += 8
+    assert store.get(pair_id) is not None
+    clock.now += 11
+    assert store.get(pair_id) is None
+    assert store.stats()["pairs"] == 0 and store.bytes == 0
+
+
+def test_pair_budget_drops_least_recently_used(clock):
+    store = PairStore(ttl=60, max_bytes=2500)
+    first, second = store.put(*frames()), store.put(*frames())
+    store.get(first)
+    third = store.put(*frames())
+    assert store.get(second) is None
+    assert store.get(first) is not None and store.get(third) is not None
+    assert store.put(*frames(4000)) is None
+    assert store.delete(first) and not store.delete(first)
+
+
+def test_artifact_expires_after_ttl_since_creation(clock):
+    store = ArtifactStore(ttl=10, max_bytes=10000)
+    artifact_id = store.put(b"image", "image/png")
+    clock.now += 9
+    assert store.get(artifact_id) == (b"image", "image/png")
+    clock.now += 2
+    assert store.get(artifact_id) is None
+    assert store.bytes == 0
+
+
+def test_artifact_budget_drops_oldest_but_keeps_the_newest(clock):
+    store = ArtifactStore(ttl=60, max_bytes=10)
+    first = store.put(b"123456", "image/png")
+    second = store.put(b"123456", "image/png")
+    assert store.get(first) is None and store.get(second) is not None
+    large = store.put(b"x" * 20, "image/png")
+    assert store.get(large) is not None
@@ -0,0 +1,36 @@
+import numpy as np
+from utils.motion_methods import METHOD_HALOS, lucas_kanade_dense_custom, dis_opencv
+from utils.tiling import split_tiles, feather_weights, run_tiled
+
+
+def test_feather_weights_fade_inside_the_halo():
+    weights = feather_weights((48, 96, 0, 48), (40, 104, 0, 56))
+    assert weights.shape == (64, 56)
+    assert (weights[8:56, :48] == 1).all()
+    # Outer half of each halo facing another tile is ignored, the inner half fades
+    assert (weights[:4] == 0).all() and (weights[60:] == 0).all() and (weights[:, 52:] == 0).all()
+    assert 0 < weights[4, 0] < weights[7, 0] < 1
+
+
+def test_split_tiles_covers_the_frame_once():
+    coverage = np.zeros((100, 130), dtype=int)
+    for (y0, y1, x0, x1), (ey0, ey1, ex0, ex1) in split_tiles((100, 130), 48, 8):
+        coverage[y0:y1, x0:x1] += 1
+        assert ey0 == max(0, y0 - 8) and ey1 == min(100, y1 + 8)
+        assert ex0 == max(0, x0 - 8) and ex1 == min(130, x1 + 8)
+    assert (coverage == 1).all()
+
+
+def test_tiled_local_method_matches_whole_frame(shifted_pair):
+    halo = METHOD_HALOS["Lucas-Kanade Dense (Custom)"]
+    u, v = run_tiled(lucas_kanade_dense_custom, *shifted_pair, halo=halo, tile_size=48)
+    u_ref, v_ref = lucas_kanade_dense_custom(*shifted_pair)
+    np.testing.assert_allclose(u, u_ref, atol=1e-4)
+    np.testing.assert_allclose(v, v_ref, atol=1e-4)
+
+
+def test_tiled_methods_get_contiguous_tiles(shifted_pair):
+    # DIS rejects non-contiguous input, which plain slices of the frame are
+    u, v = run_tiled(dis_opencv, *shifted_pair, halo=METHOD_HALOS["DIS Fast (OpenCV)"], tile_size=48)
+    assert u.shape == shifted_pair[0].shape and np.isfinite(u).all() and np.isfinite(v).all()
+
@@ -0,0 +1,56 @@
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+# Seconds a rendered artifact stays downloadable, and the memory budget of all artifacts
+DEFAULT_ARTIFACT_TTL = float(os.environ.get("FLOW_ARTIFACT_TTL", "120"))
+DEFAULT_ARTIFACT_MB = int(os.environ.get("FLOW_ARTIFACT_MB", "64"))
+
+
+class ArtifactStore:
+    """
+    Short-lived encoded outputs (rendered images) served by URL.
+
+    Artifacts expire ``ttl`` seconds after creation; the oldest are
+    dropped early once their total size exceeds ``max_bytes``.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._artifacts: "OrderedDict[str, Tuple[bytes, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+
+    def _drop_oldest(self) -> None:
+        _, (content, _, _) = self._artifacts.popitem(last=False)
+        self.bytes -= len(content)
+
+    def _expire(self, now: float) -> None:
+        while self._artifacts and next(iter(self._artifacts.values()))[2] <= now:
+            self._drop_oldest()
+
+    def put(self, content: bytes, media_type: str) -> str:
+        """Store an artifact and return its id."""
+        artifact_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._artifacts[artifact_id] = (content, media_type, now + self.ttl)
+            self.bytes += len(content)
+            while self.bytes > self.max_bytes and len(self._artifacts) > 1:
+                self._drop_oldest()
+        return artifact_id
+
+    def get(self, artifact_id: str) -> Optional[Tuple[bytes, str]]:
+        """The (content, media_type) of an artifact, or None if unknown or expired."""
+        with self._lock:
+            self._expire(time.monotonic())
+            artifact = self._artifacts.get(artifact_id)
+            return None if artifact is None else artifact[:2]
+
+
+artifact_store = ArtifactStore(DEFAULT_ARTIFACT_TTL, DEFAULT_ARTIFACT_MB * 1024 * 1024)
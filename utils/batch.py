@@ -0,0 +1,37 @@
+import os
+import zipfile
+from typing import Dict, List, Tuple
+from utils.streaming import IMAGE_EXTENSIONS
+
+
+def archive_pairs(archive: zipfile.ZipFile) -> List[Dict[str, str]]:
+    """
+    Frame pairs in a zip archive.
+
+    Images are grouped by directory and each one is paired with the next
+    by name, so a Middlebury sequence directory (frame10.png,
+    frame11.png) gives one pair. Only the member list is read; the
+    images stay in the archive until ``read_members`` is called.
+
+    Returns:
+        One dict per pair with the directory as "pair" and the member
+        names as "frame1" and "frame2"
+    """
+    directories: Dict[str, List[str]] = {}
+    for info in archive.infolist():
+        name = info.filename
+        if info.is_dir() or not name.lower().endswith(IMAGE_EXTENSIONS) or "__MACOSX" in name:
+            continue
+        directories.setdefault(os.path.dirname(name), []).append(name)
+
+    pairs = []
+    for directory in sorted(directories):
+        names = sorted(directories[directory])
+        for first, second in zip(names, names[1:]):
+            pairs.append({"pair": directory or ".", "frame1": first, "frame2": second})
+    return pairs
+
+
+def read_members(archive: zipfile.ZipFile, pair: Dict[str, str]) -> Tuple[bytes, bytes]:
+    """Encoded bytes of both frames of an ``archive_pairs`` entry."""
+    return archive.read(pair["frame1"]), archive.read(pair["frame2"])
@@ -0,0 +1,204 @@
+import os
+import sys
+import time
+import platform
+import tracemalloc
+import numpy as np
+import cv2
+from typing import Any, Callable, Dict, List, Tuple
+from utils.frame_context import FramePairContext
+from utils.evaluation_metrics import accepts_keyword, calculate_flow_statistics
+from utils.streaming import IMAGE_EXTENSIONS
+
+DEFAULT_DATA_DIR = os.path.join("eval-color-twoframes", "eval-data")
+
+# Relative slowdown of a method's fastest-run latency that counts as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+# Timed runs both reports need before a slowdown can count as a regression
+MIN_REGRESSION_REPEAT = 3
+
+
+def load_sequences(data_dir: str) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Grayscale (frame1, frame2) of every sequence directory under ``data_dir``: its first two images by name."""
+    sequences = {}
+    for name in sorted(os.listdir(data_dir)):
+        path = os.path.join(data_dir, name)
+        if not os.path.isdir(path):
+            continue
+        images = sorted(n for n in os.listdir(path) if n.lower().endswith(IMAGE_EXTENSIONS))
+        if len(images) < 2:
+            continue
+        frame1 = cv2.imread(os.path.join(path, images[0]), cv2.IMREAD_GRAYSCALE)
+        frame2 = cv2.imread(os.path.join(path, images[1]), cv2.IMREAD_GRAYSCALE)
+        if frame1 is not None and frame2 is not None:
+            sequences[name] = (frame1, frame2)
+    return sequences
+
+
+def _call(method_func, frame1: np.ndarray, frame2: np.ndarray):
+    """Run a method the way ``compare_methods`` does, with a fresh context for the pair."""
+    kwargs = {"context": FramePairContext(frame1, frame2)} if accepts_keyword(method_func, "context") else {}
+    return method_func(frame1, frame2, **kwargs)
+
+
+def _check_runs(warmup: int, repeat: int) -> None:
+    """Reject run counts that would leave nothing to time."""
+    if repeat < 1:
+        raise ValueError(f"repeat must be at least 1, got {repeat}")
+    if warmup < 0:
+        raise ValueError(f"warmup must not be negative, got {warmup}")
+
+
+def benchmark_method(method_func: Callable, frame1: np.ndarray, frame2: np.ndarray,
+                     warmup: int = 1, repeat: int = 5) -> Dict[str, Any]:
+    """
+    Time one method on one frame pair.
+
+    ``warmup`` untimed runs come first (imports, JIT-like caches, pool
+    start-up), then ``repeat`` timed runs. Peak memory is measured in one
+    extra run under ``tracemalloc``, so its overhead does not distort the
+    timings; it covers NumPy and Python allocations, not OpenCV's own.
+    Raises ValueError unless ``repeat >= 1`` and ``warmup >= 0``.
+    """
+    _check_runs(warmup, repeat)
+    for _ in range(warmup):
+        _call(method_func, frame1, frame2)
+
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        u, v = _call(method_func, frame1, frame2)
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        _call(method_func, frame1, frame2)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    median = float(np.median(times))
+    megapixels = frame1.shape[0] * frame1.shape[1] / 1e6
+    return {
+        "median": round(median, 5),
+        "p95": round(float(np.percentile(times, 95)), 5),
+        "min": round(float(min(times)), 5),
+        "mpx_per_s": round(megapixels / median, 3) if median > 0 else None,
+        "peak_mb": round(peak / 2 ** 20, 2),
+        "statistics": calculate_flow_statistics(u, v)
+    }
+
+
+def summarize(sequences: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """One method's figures across sequences: total of the medians, mean throughput and worst peak memory."""
+    runs = list(sequences.values())
+    throughputs = [r["mpx_per_s"] for r in runs if r["mpx_per_s"]]
+    return {
+        "total_median": round(sum(r["median"] for r in runs), 5),
+        "total_p95": round(sum(r["p95"] for r in runs), 5),
+        "mean_mpx_per_s": round(float(np.mean(throughputs)), 3) if throughputs else None,
+        "peak_mb": max(r["peak_mb"] for r in runs)
+    }
+
+
+def run_benchmark(methods: Dict[str, Callable], sequences: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                  warmup: int = 1, repeat: int = 5, progress: Callable[[str, str], None] = None) -> Dict[str, Any]:
+    """Benchmark every method on every sequence; methods that raise are reported with their error."""
+    _check_runs(warmup, repeat)
+    results = {}
+    for method_name, method_func in methods.items():
+        per_sequence = {}
+        try:
+            for sequence_name, (frame1, frame2) in sequences.items():
+                if progress is not None:
+                    progress(method_name, sequence_name)
+                per_sequence[sequence_name] = benchmark_method(method_func, frame1, frame2, warmup, repeat)
+        except Exception as e:
+            results[method_name] = {"error": str(e)}
+            continue
+        results[method_name] = {"summary": summarize(per_sequence), "sequences": per_sequence}
+
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count()
+        },
+        "settings": {"warmup": warmup, "repeat": repeat, "sequences": list(sequences)},
+        "methods": results
+    }
+
+
+def compare_to_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                        threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Per-method change in total fastest-run latency against a saved report.
+
+    The fastest of the timed runs is compared because noise (other
+    processes, frequency scaling) only ever adds time; medians of a few
+    runs swing by more than a typical threshold. Only sequences present in
+    both reports are compared. A method is a regression when it got slower
+    by more than ``threshold`` (relative), and only when both reports
+    timed at least ``MIN_REGRESSION_REPEAT`` runs; otherwise changes are
+    listed but marked inconclusive.
+    """
+    repeats = (report.get("settings", {}).get("repeat", 0), baseline.get("settings", {}).get("repeat", 0))
+    conclusive = min(repeats) >= MIN_REGRESSION_REPEAT
+    changes = []
+    for method_name, result in report["methods"].items():
+        previous = baseline.get("methods", {}).get(method_name)
+        if "sequences" not in result or not previous or "sequences" not in previous:
+            continue
+        common = [s for s in result["sequences"] if s in previous["sequences"]]
+        if not common:
+            continue
+        current = sum(result["sequences"][s]["min"] for s in common)
+        before = sum(previous["sequences"][s]["min"] for s in common)
+        change = current / before - 1 if before > 0 else 0.0
+        changes.append({
+            "method": method_name,
+            "baseline": round(before, 5),
+            "current": round(current, 5),
+            "change": round(change, 4),
+            "regression": conclusive and change > threshold,
+            "conclusive": conclusive
+        })
+    return changes
+
+
+def format_table(report: Dict[str, Any]) -> str:
+    """Per-method summary as a plain-text table."""
+    header = f"{'Method':<40} {'median s':>10} {'p95 s':>10} {'Mpx/s':>8} {'peak MB':>8}"
+    lines = [header, "-" * len(header)]
+    for method_name, result in report["methods"].items():
+        if "error" in result:
+            lines.append(f"{method_name:<40} error: {result['error']}")
+            continue
+        summary = result["summary"]
+        throughput = f"{summary['mean_mpx_per_s']:.2f}" if summary["mean_mpx_per_s"] else "-"
+        lines.append(f"{method_name:<40} {summary['total_median']:>10.4f} {summary['total_p95']:>10.4f} "
+                     f"{throughput:>8} {summary['peak_mb']:>8.1f}")
+    return "\n".join(lines)
+
+
+def format_changes(changes: List[Dict[str, Any]], threshold: float) -> str:
+    """Baseline comparison as a plain-text table."""
+    header = f"{'Method':<40} {'baseline s':>10} {'current s':>10} {'change':>8}"
+    lines = [header, "-" * len(header)]
+    for change in changes:
+        flag = "  REGRESSION" if change["regression"] else "" if change["conclusive"] else "  (too few runs)"
+        lines.append(f"{change['method']:<40} {change['baseline']:>10.4f} {change['current']:>10.4f} "
+                     f"{change['change'] * 100:>+7.1f}%{flag}")
+    regressions = sum(c["regression"] for c in changes)
+    lines.append(f"\n{regressions} regression(s) above {threshold * 100:.0f}%")
+    if changes and not all(c["conclusive"] for c in changes):
+        lines.append(f"Regressions need at least {MIN_REGRESSION_REPEAT} timed runs in both reports")
+    return "\n".join(lines)
+
+
+def print_progress(method_name: str, sequence_name: str) -> None:
+    """Progress callback for ``run_benchmark`` writing to stderr."""
+    print(f"  {method_name}: {sequence_name}", file=sys.stderr)
@@ -0,0 +1,137 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable
+
+# Requests computed at once, requests allowed to wait for a worker, and the back-off suggested when full
+DEFAULT_COMPUTE_WORKERS = int(os.environ.get("FLOW_COMPUTE_WORKERS", "4"))
+DEFAULT_COMPUTE_QUEUE = int(os.environ.get("FLOW_COMPUTE_QUEUE", "16"))
+DEFAULT_RETRY_AFTER = int(os.environ.get("FLOW_RETRY_AFTER", "2"))
+
+# How often a waiting request checks whether its client is still connected
+DISCONNECT_POLL_INTERVAL = 0.25
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the queue is full."""
+
+
+class ClientDisconnected(Exception):
+    """Raised when the client went away before its work finished."""
+
+
+class ComputePool:
+    """
+    Bounded thread pool for CPU-bound request work, with admission control.
+
+    At most ``max_workers`` jobs run and ``max_queue`` more wait; further
+    submissions are rejected straight away with ``PoolSaturated`` so the
+    event loop stays free for cheap requests. Jobs still queued when
+    their client disconnects are cancelled; running jobs finish in the
+    background and free their slot when done.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="compute")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def _release(self, _future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def submit(self, func: Callable[[], Any]) -> Future:
+        """Queue ``func`` without waiting for it; raises ``PoolSaturated`` when full."""
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise PoolSaturated("Compute pool is saturated")
+            self._in_flight += 1
+
+        future = self._executor.submit(func)
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func: Callable[[], Any],
+                  disconnected: Callable[[], Awaitable[bool]] = None) -> Any:
+        """Run ``func`` on the pool and await its result.
+
+        ``disconnected`` is polled while waiting; once it returns True the
+        job is cancelled if it has not started and ``ClientDisconnected``
+        is raised.
+        """
+        future = self.submit(func)
+        waiter = asyncio.wrap_future(future)
+        while True:
+            done, _ = await asyncio.wait({waiter}, timeout=DISCONNECT_POLL_INTERVAL if disconnected else None)
+            if done:
+                return waiter.result()
+            if await disconnected():
+                if future.cancel():
+                    with self._lock:
+                        self.cancelled += 1
+                # Nobody will read the outcome of an abandoned job
+                waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+                raise ClientDisconnected("Client disconnected")
+
+    async def as_completed(self, funcs: Iterable[Callable[[], Any]], window: int = None) -> AsyncIterator[Any]:
+        """Run ``funcs`` on the pool and yield their results in completion order.
+
+        At most ``window`` of them (default ``max_workers``) are submitted at
+        once and the next one is only taken from ``funcs`` when a slot frees
+        up, so a lazily generated batch never holds more than ``window``
+        jobs. When the pool is saturated by other requests the batch waits
+        instead of failing. Jobs not yet started are cancelled if the
+        consumer stops early.
+        """
+        funcs = iter(funcs)
+        window = window or self.max_workers
+        pending: Dict[asyncio.Future, Future] = {}
+        held = None
+        try:
+            while True:
+                while len(pending) < window:
+                    if held is None:
+                        held = next(funcs, None)
+                        if held is None:
+                            break
+                    try:
+                        future = self.submit(held)
+                    except PoolSaturated:
+                        break
+                    pending[asyncio.wrap_future(future)] = future
+                    held = None
+                if not pending:
+                    if held is None:
+                        return
+                    await asyncio.sleep(DISCONNECT_POLL_INTERVAL)
+                    continue
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for waiter in done:
+                    del pending[waiter]
+                    yield waiter.result()
+        finally:
+            for waiter, future in pending.items():
+                if future.cancel():
+                    with self._lock:
+                        self.cancelled += 1
+                waiter.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+    def stats(self) -> Dict[str, int]:
+        """Configured limits and current load."""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": self._in_flight,
+                "rejected": self.rejected,
+                "cancelled": self.cancelled
+            }
+
+
+compute_pool = ComputePool(DEFAULT_COMPUTE_WORKERS, DEFAULT_COMPUTE_QUEUE)
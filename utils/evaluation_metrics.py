@@ -1,6 +1,20 @@
+import functools
+import inspect
+import os
+import threading
 import numpy as np
 import time
-from typing import Tuple, Dict, Any
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Callable, Tuple, Dict, Any, List
+from utils.frame_context import FramePairContext, share_frame, attach_frame, close_frames
+from utils.motion_methods import METHOD_HALOS, deadline_passed
+from utils.tiling import DEFAULT_TILE_SIZE, DEFAULT_TILE_WORKERS, run_tiled
+from utils.quality import QUALITY_TIERS, downscale_frame, resize_flow
+from utils.flow_cache import FlowCache, frame_pair_digest, method_signature
+from utils.timing import StageTimer
+from utils.profiling import RequestProfile, profile_call
 
 
 def calculate_angular_error(u_true: np.ndarray, v_true: np.ndarray,
@@ -53,85 +67,532 @@ def calculate_mae(u_true: np.ndarray, v_true: np.ndarray,
 
 def measure_execution_time(func, *args, **kwargs) -> Tuple[Any, float]:
     """Measure execution time of a function."""
-    start_time = time.time()
+    start_time = time.perf_counter()
     result = func(*args, **kwargs)
-    end_time = time.time()
+    end_time = time.perf_counter()
     execution_time = end_time - start_time
     return result, execution_time
 
 
+# Elements processed per chunk by the fused metric kernels, bounding their float32 temporaries
+METRICS_CHUNK_ELEMENTS = int(os.environ.get("FLOW_METRICS_CHUNK", str(1 << 20)))
+
+PAIRWISE_METRICS = ("mse", "mae", "endpoint_error", "angular_error")
+
+
+def _row_chunks(height: int, width: int, planes: int = 1):
+    """Row slices covering ``height`` with about ``METRICS_CHUNK_ELEMENTS`` elements over ``planes`` planes each."""
+    rows = max(1, METRICS_CHUNK_ELEMENTS // max(1, planes * width))
+    for start in range(0, height, rows):
+        yield slice(start, start + rows)
+
+
+def _merge_moments(moments: np.ndarray, chunk: np.ndarray) -> None:
+    """
+    Fold a chunk's count, mean and sum of squared deviations into ``moments`` (Chan et al.).
+
+    Deviations are taken from each chunk's own mean in float64, so the
+    variance of a field with a large constant offset stays exact.
+    """
+    count = chunk.size
+    if count == 0:
+        return
+    mean = chunk.mean(dtype=np.float64)
+    deviation = np.subtract(chunk, mean, dtype=np.float64)
+    m2 = float(np.vdot(deviation, deviation))
+    total = moments[0] + count
+    delta = mean - moments[1]
+    moments[1] += delta * count / total
+    moments[2] += m2 + delta * delta * moments[0] * count / total
+    moments[0] = total
+
+
 def calculate_flow_statistics(u: np.ndarray, v: np.ndarray) -> Dict[str, float]:
-    """Calculate basic statistics of flow field."""
-    magnitude = np.sqrt(u**2 + v**2)
+    """Calculate basic statistics of flow field.
+
+    One chunked float32 pass over u and v; means and variances are merged
+    across chunks in float64.
+    """
+    h, w = u.shape[:2]
+    moments = np.zeros((3, 3))  # count, mean, squared deviations of u, v and the magnitude
+    max_magnitude = 0.0
+    for rows in _row_chunks(h, w, 3):
+        uc = np.asarray(u[rows], dtype=np.float32)
+        vc = np.asarray(v[rows], dtype=np.float32)
+        magnitude = np.sqrt(uc * uc + vc * vc)
+        for row, chunk in zip(moments, (uc, vc, magnitude)):
+            _merge_moments(row, chunk)
+        max_magnitude = max(max_magnitude, float(magnitude.max(initial=0.0)))
+    (_, mean_u, m2_u), (_, mean_v, m2_v), (count, mean_magnitude, m2_magnitude) = moments
+    count = max(count, 1)
     return {
-        "mean_magnitude": float(np.mean(magnitude)),
-        "max_magnitude": float(np.max(magnitude)),
-        "std_magnitude": float(np.std(magnitude)),
-        "mean_u": float(np.mean(u)),
-        "mean_v": float(np.mean(v)),
-        "std_u": float(np.std(u)),
-        "std_v": float(np.std(v))
+        "mean_magnitude": float(mean_magnitude),
+        "max_magnitude": max_magnitude,
+        "std_magnitude": float(np.sqrt(m2_magnitude / count)),
+        "mean_u": float(mean_u),
+        "mean_v": float(mean_v),
+        "std_u": float(np.sqrt(m2_u / count)),
+        "std_v": float(np.sqrt(m2_v / count))
     }
 
 
-def compare_methods(frame1: np.ndarray, frame2: np.ndarray, methods: Dict[str, callable]) -> Dict[str, Dict[str, Any]]:
-    """Compare multiple optical flow methods and return results with metrics."""
+def pairwise_flow_metrics(flows: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    MSE, MAE, endpoint error and angular error between every pair of flows.
+
+    ``flows`` is a stacked (N, 2, H, W) array of (u, v) fields. All four
+    metrics of all pairs come from one chunked float32 pass over the
+    stack, with the same definitions as ``calculate_mse``,
+    ``calculate_mae``, ``calculate_endpoint_error`` and
+    ``calculate_angular_error``.
+
+    Returns:
+        Metric name -> symmetric (N, N) matrix with a zero diagonal
+    """
+    n, _, h, w = flows.shape
+    first, second = np.triu_indices(n, 1)
+    pairs = len(first)
+    squared_error = np.zeros(pairs)
+    absolute_error = np.zeros(pairs)
+    endpoint_error = np.zeros(pairs)
+    angle_sum = np.zeros(pairs)
+    angle_count = np.zeros(pairs)
+
+    for rows in _row_chunks(h, w, max(n, 4 * pairs)):
+        u = np.asarray(flows[:, 0, rows], dtype=np.float32)
+        v = np.asarray(flows[:, 1, rows], dtype=np.float32)
+        magnitude = np.sqrt(u * u + v * v)
+        du = u[first] - u[second]
+        dv = v[first] - v[second]
+        squared = du * du + dv * dv
+        squared_error += squared.sum(axis=(1, 2), dtype=np.float64)
+        absolute_error += np.abs(du).sum(axis=(1, 2), dtype=np.float64) + np.abs(dv).sum(axis=(1, 2), dtype=np.float64)
+        endpoint_error += np.sqrt(squared).sum(axis=(1, 2), dtype=np.float64)
+
+        magnitude_product = magnitude[first] * magnitude[second]
+        valid = (magnitude[first] > 1e-6) & (magnitude[second] > 1e-6)
+        cos_angle = np.divide(u[first] * u[second] + v[first] * v[second], magnitude_product,
+                              out=np.zeros_like(magnitude_product), where=valid)
+        angle = np.degrees(np.arccos(np.clip(np.abs(cos_angle), 0.0, 1.0)))
+        angle_sum += np.where(valid, angle, 0.0).sum(axis=(1, 2), dtype=np.float64)
+        angle_count += valid.sum(axis=(1, 2))
+
+    count = h * w
+    values = {
+        "mse": squared_error / (2 * count),
+        "mae": absolute_error / (2 * count),
+        "endpoint_error": endpoint_error / count,
+        "angular_error": np.divide(angle_sum, angle_count, out=np.zeros(pairs), where=angle_count > 0)
+    }
+    matrices = {}
+    for name, pair_values in values.items():
+        matrix = np.zeros((n, n))
+        matrix[first, second] = pair_values
+        matrix[second, first] = pair_values
+        matrices[name] = matrix
+    return matrices
+
+
+def accepts_keyword(func, name: str) -> bool:
+    """Check whether a method accepts the given keyword argument."""
+    try:
+        return name in inspect.signature(func).parameters
+    except (TypeError, ValueError):
+        return False
+
+
+# Execution defaults for compare_methods, overridable per call or through the environment
+DEFAULT_EXECUTOR = os.environ.get("FLOW_EXECUTOR", "thread")
+DEFAULT_MAX_WORKERS = int(os.environ.get("FLOW_MAX_WORKERS", "0")) or None
+DEFAULT_METHOD_TIMEOUT = float(os.environ.get("FLOW_METHOD_TIMEOUT", "0")) or None
+
+EXECUTORS = ("serial", "thread", "process")
+
+# Extra time granted after a deadline for anytime methods to return their flow
+DEADLINE_GRACE = 0.05
+
+# Observed seconds per megapixel for each method, used to decide downgrades under a deadline
+_runtime_estimates: Dict[str, float] = {}
+_runtime_estimates_lock = threading.Lock()
+
+# Methods given up on after a timeout that are still running in a pool: a future cannot stop a running call
+_abandoned_running: Dict[str, int] = {}
+_abandoned_total = 0
+_abandoned_lock = threading.Lock()
+
+
+class DeadlineSkipped(Exception):
+    """Raised when a method is not started because the request deadline has passed."""
+
+
+class MethodCancelled(Exception):
+    """Recorded for methods not started because the comparison was cancelled."""
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _update_runtime_estimate(method_name: str, per_mpx: float) -> None:
+    """Blend a new seconds-per-megapixel observation into the method's estimate."""
+    with _runtime_estimates_lock:
+        previous = _runtime_estimates.get(method_name)
+        _runtime_estimates[method_name] = per_mpx if previous is None else 0.7 * previous + 0.3 * per_mpx
+
+
+def _get_runtime_estimate(method_name: str) -> float:
+    """Seconds per megapixel observed for the method, or None."""
+    with _runtime_estimates_lock:
+        return _runtime_estimates.get(method_name)
+
+
+def _abandon(future, method_name: str) -> None:
+    """Count a timed-out future that could not be cancelled until its method returns."""
+    global _abandoned_total
+    with _abandoned_lock:
+        _abandoned_running[method_name] = _abandoned_running.get(method_name, 0) + 1
+        _abandoned_total += 1
+
+    def finished(_):
+        with _abandoned_lock:
+            _abandoned_running[method_name] -= 1
+            if not _abandoned_running[method_name]:
+                del _abandoned_running[method_name]
+
+    future.add_done_callback(finished)
+
+
+def abandoned_stats() -> Dict[str, Any]:
+    """Timed-out methods still occupying a worker, per method, and the total abandoned so far."""
+    with _abandoned_lock:
+        return {"running": dict(_abandoned_running), "total": _abandoned_total}
+
+
+def _get_executor(kind: str, max_workers: int = None):
+    """Return a long-lived thread or process pool, created on first use."""
+    with _executors_lock:
+        key = (kind, max_workers)
+        if key not in _executors:
+            pool_cls = ThreadPoolExecutor if kind == "thread" else ProcessPoolExecutor
+            _executors[key] = pool_cls(max_workers=max_workers)
+        return _executors[key]
+
+
+def _run_method(method_func, frame1: np.ndarray, frame2: np.ndarray, context: FramePairContext,
+                submitted: float, deadline: float = None, profile: bool = False) -> Dict[str, Any]:
+    """Run one method and time it; ``submitted`` is the perf_counter value at dispatch.
+
+    With ``profile`` the method runs under cProfile and the raw data is
+    returned as ``profile_stats``.
+    """
+    started = time.perf_counter()
+    if deadline_passed(deadline):
+        raise DeadlineSkipped("Skipped: deadline passed before the method started")
+
+    # Methods that expose solver details (iterations, residual, ...) fill this dict
+    method_info = {}
+    kwargs = {"info": method_info} if accepts_keyword(method_func, "info") else {}
+    if accepts_keyword(method_func, "context"):
+        kwargs["context"] = context
+    if deadline is not None and accepts_keyword(method_func, "deadline"):
+        kwargs["deadline"] = deadline
+
+    profile_stats = None
+    if profile:
+        ((u, v), execution_time), profile_stats = profile_call(
+            measure_execution_time, method_func, frame1, frame2, **kwargs)
+    else:
+        (u, v), execution_time = measure_execution_time(method_func, frame1, frame2, **kwargs)
+    return {
+        "flow": (u, v),
+        "execution_time": execution_time,
+        "queue_delay": started - submitted,
+        "method_info": method_info,
+        "cache_stats": context.stats() if "context" in kwargs else None,
+        "profile_stats": profile_stats
+    }
+
+
+def _run_method_shared(method_func, specs, submitted: float, deadline: float = None,
+                       profile: bool = False) -> Dict[str, Any]:
+    """Process-pool entry point: attach to both frames in shared memory and run the method."""
+    (shm1, frame1), (shm2, frame2) = [attach_frame(spec) for spec in specs]
+    try:
+        result = _run_method(method_func, frame1, frame2, FramePairContext(frame1, frame2),
+                             submitted, deadline, profile)
+        # Views into the shared buffers must be gone before the blocks can be closed
+        del frame1, frame2
+        return result
+    finally:
+        close_frames(shm1, shm2)
+
+
+def compare_methods(frame1: np.ndarray, frame2: np.ndarray, methods: Dict[str, callable],
+                    context: FramePairContext = None, executor: str = None, max_workers: int = None,
+                    timeout: float = None, tile_size: int = None,
+                    halos: Dict[str, int] = None, scale: float = 1.0,
+                    deadline_ms: float = None, cache: FlowCache = None,
+                    on_result: Callable[[str, Dict[str, Any]], None] = None,
+                    cancel_event: threading.Event = None,
+                    output_shape: Tuple[int, int] = None,
+                    timer: StageTimer = None,
+                    profile: RequestProfile = None) -> Dict[str, Dict[str, Any]]:
+    """Compare multiple optical flow methods and return results with metrics.
+
+    Methods are dispatched to a thread or process pool (``executor`` is
+    "thread", "process" or "serial") and collected as they finish. Any
+    method not done within ``timeout`` seconds of dispatch is reported as
+    failed. ``execution_time`` is the wall time spent inside the method and
+    ``queue_delay`` the time it waited for a free worker.
+
+    Methods that accept a ``context`` share one ``FramePairContext`` so
+    float frames, gradients and pyramids are computed once per pair. The
+    cache hits and misses caused by each method are reported under
+    ``cache_stats``. Process workers cannot share the cache, so each
+    builds its own; the frames themselves are passed through shared memory.
+
+    With ``tile_size`` set, methods that declare a halo in ``halos``
+    (``METHOD_HALOS`` by default) are run tile by tile on a process pool
+    whenever the frame is larger than one tile.
+
+    With ``scale < 1`` the methods run on downscaled frames and their
+    flows are upsampled back to the input resolution, with the vectors
+    rescaled. A ``context`` passed in describes the input frames, so it
+    is not used in that case. ``output_shape`` (height, width) resamples
+    the flows to another size instead, e.g. the original resolution of
+    frames that were decoded reduced.
+
+    With ``deadline_ms`` the whole comparison gets a time budget. Methods
+    that accept a ``deadline`` stop at it and report where they were
+    truncated in ``method_info``. Other methods whose observed runtime
+    would not fit are downgraded to their preview parameters (or skipped
+    when they have none), methods not started in time are skipped, and
+    anything still running after the budget is reported as timed out.
+
+    With a ``cache``, each method is first looked up by the content of the
+    frame pair, its parameters, the scale and tiling; hits are returned
+    with ``cached`` set instead of being recomputed. Truncated and
+    downgraded results are not stored.
+
+    ``on_result(method_name, result)`` is called as each method finishes,
+    before comparison metrics exist. Setting ``cancel_event`` stops
+    methods that have not started yet; they are reported as cancelled.
+
+    A ``timer`` accumulates the post-processing stages: "resize" (flow
+    resampling), "statistics" and "comparison" (the cross-method metrics).
+
+    With a ``profile``, methods run on a thread or process pool are each
+    profiled in their worker and merged into it. Serial methods run in
+    the calling thread, which the caller profiles.
+    """
+    stage = timer.stage if timer is not None else lambda name: nullcontext()
+    deadline = time.perf_counter() + deadline_ms / 1000 if deadline_ms else None
+    executor = executor or DEFAULT_EXECUTOR
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    timeout = timeout or DEFAULT_METHOD_TIMEOUT
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor: {executor}")
+
+    full_shape = tuple(output_shape) if output_shape else frame1.shape[:2]
+    pair_digest = frame_pair_digest(frame1, frame2) if cache is not None else None
+    if scale != 1.0:
+        frame1 = downscale_frame(frame1, scale)
+        frame2 = downscale_frame(frame2, scale)
+        context = None
+    if context is None:
+        context = FramePairContext(frame1, frame2)
+
+    tile_size = DEFAULT_TILE_SIZE if tile_size is None else tile_size
+    halos = METHOD_HALOS if halos is None else halos
+    tiled = set()
+    if tile_size and max(frame1.shape[:2]) > tile_size:
+        methods = dict(methods)
+        for method_name, method_func in methods.items():
+            if method_name in halos:
+                methods[method_name] = functools.partial(
+                    run_tiled, method_func, halo=halos[method_name], tile_size=tile_size,
+                    max_workers=DEFAULT_TILE_WORKERS)
+                tiled.add(method_name)
+
+    downgraded = set()
     results = {}
     flows = {}
 
-    # Calculate flows for all methods
-    for method_name, method_func in methods.items():
-        try:
-            (u, v), execution_time = measure_execution_time(
-                method_func, frame1, frame2)
+    def record(method_name: str, outcome) -> None:
+        """Turn one method's outcome into its result entry as soon as it is available."""
+        if isinstance(outcome, dict) and outcome.get("cached"):
+            results[method_name] = dict(outcome)
+            flows[method_name] = outcome["flow_vectors"]
+        elif isinstance(outcome, Exception):
+            results[method_name] = {
+                "execution_time": 0,
+                "statistics": {},
+                "flow_vectors": None,
+                "success": False,
+                "error": str(outcome)
+            }
+            if isinstance(outcome, DeadlineSkipped):
+                results[method_name]["skipped"] = True
+            if isinstance(outcome, MethodCancelled):
+                results[method_name]["cancelled"] = True
+        else:
+            if profile is not None:
+                profile.add(outcome["profile_stats"])
+            with stage("resize"):
+                u, v = resize_flow(*outcome["flow"], full_shape)
             flows[method_name] = (u, v)
 
             # Calculate basic statistics
-            stats = calculate_flow_statistics(u, v)
+            with stage("statistics"):
+                stats = calculate_flow_statistics(u, v)
 
             results[method_name] = {
-                "execution_time": round(execution_time, 4),
+                "execution_time": round(outcome["execution_time"], 4),
+                "queue_delay": round(outcome["queue_delay"], 4),
                 "statistics": stats,
                 "flow_vectors": (u, v),  # Include flow vectors in results
                 "success": True
             }
-        except Exception as e:
-            results[method_name] = {
-                "execution_time": 0,
-                "statistics": {},
-                "flow_vectors": None,
-                "success": False,
-                "error": str(e)
-            }
+            if outcome["method_info"]:
+                results[method_name]["method_info"] = outcome["method_info"]
+            if outcome["cache_stats"] is not None:
+                results[method_name]["cache_stats"] = outcome["cache_stats"]
+            if method_name in tiled:
+                results[method_name]["tiled"] = True
+            if method_name in downgraded:
+                results[method_name]["downgraded"] = True
+            elif not outcome["method_info"].get("truncated"):
+                if method_name not in tiled:
+                    per_mpx = outcome["execution_time"] / max(1e-6, frame1.shape[0] * frame1.shape[1] / 1e6)
+                    _update_runtime_estimate(method_name, per_mpx)
+                if cache is not None:
+                    cache.put(cache_keys[method_name], dict(results[method_name], cached=True))
+
+        if on_result is not None:
+            on_result(method_name, results[method_name])
 
-    # Calculate cross-method comparisons (using first successful method as reference)
-    reference_method = None
-    for method_name, result in results.items():
-        if result["success"]:
-            reference_method = method_name
-            break
+    outcomes = {}
+    cache_keys = {}
+    if cache is not None:
+        for method_name, method_func in methods.items():
+            cache_keys[method_name] = (pair_digest, method_name, method_signature(method_func), scale, full_shape)
+            cached = cache.get(cache_keys[method_name])
+            if cached is not None:
+                outcomes[method_name] = cached
+                record(method_name, cached)
 
-    if reference_method and len([r for r in results.values() if r["success"]]) > 1:
-        ref_u, ref_v = flows[reference_method]
+    if deadline is not None:
+        methods = dict(methods)
+        megapixels = frame1.shape[0] * frame1.shape[1] / 1e6
+        budget = deadline_ms / 1000
+        for method_name, method_func in list(methods.items()):
+            if method_name in outcomes:
+                continue
+            estimate = _get_runtime_estimate(method_name)
+            if accepts_keyword(method_func, "deadline") or estimate is None or estimate * megapixels <= budget:
+                continue
+            preview = QUALITY_TIERS["preview"]["params"].get(method_name)
+            if preview:
+                methods[method_name] = functools.partial(method_func, **preview)
+                downgraded.add(method_name)
+            else:
+                outcomes[method_name] = DeadlineSkipped("Skipped: expected runtime exceeds the deadline")
+                record(method_name, outcomes[method_name])
+        budget_timeout = budget + DEADLINE_GRACE
+        timeout = min(timeout, budget_timeout) if timeout else budget_timeout
 
-        for method_name, result in results.items():
-            if result["success"] and method_name != reference_method:
-                u, v = flows[method_name]
+    shared_blocks = []
+    try:
+        pending = {name: func for name, func in methods.items() if name not in outcomes}
+        if executor == "serial":
+            for method_name, method_func in pending.items():
+                if cancel_event is not None and cancel_event.is_set():
+                    outcomes[method_name] = MethodCancelled("Cancelled")
+                else:
+                    try:
+                        outcomes[method_name] = _run_method(
+                            method_func, frame1, frame2, context.view(), time.perf_counter(), deadline)
+                    except Exception as e:
+                        outcomes[method_name] = e
+                record(method_name, outcomes[method_name])
+        else:
+            pool = _get_executor(executor, max_workers)
+            futures = {}
+            if executor == "process":
+                specs = []
+                for frame in (frame1, frame2):
+                    shm, spec = share_frame(frame)
+                    shared_blocks.append(shm)
+                    specs.append(spec)
+                for method_name, method_func in pending.items():
+                    futures[pool.submit(_run_method_shared, method_func, specs,
+                                        time.perf_counter(), deadline, profile is not None)] = method_name
+            else:
+                for method_name, method_func in pending.items():
+                    futures[pool.submit(_run_method, method_func, frame1, frame2,
+                                        context.view(), time.perf_counter(), deadline,
+                                        profile is not None)] = method_name
 
-                # Ensure same dimensions for comparison
-                min_h = min(ref_u.shape[0], u.shape[0])
-                min_w = min(ref_u.shape[1], u.shape[1])
+            try:
+                for future in as_completed(futures, timeout=timeout):
+                    method_name = futures[future]
+                    if method_name in outcomes:
+                        continue
+                    try:
+                        outcomes[method_name] = future.result()
+                    except Exception as e:
+                        outcomes[method_name] = e
+                    record(method_name, outcomes[method_name])
 
-                ref_u_crop = ref_u[:min_h, :min_w]
-                ref_v_crop = ref_v[:min_h, :min_w]
-                u_crop = u[:min_h, :min_w]
-                v_crop = v[:min_h, :min_w]
+                    if cancel_event is not None and cancel_event.is_set():
+                        for other, other_name in futures.items():
+                            if other_name not in outcomes and other.cancel():
+                                outcomes[other_name] = MethodCancelled("Cancelled")
+                                record(other_name, outcomes[other_name])
+            except FuturesTimeoutError:
+                for future, method_name in futures.items():
+                    if method_name not in outcomes:
+                        if not future.cancel():
+                            _abandon(future, method_name)
+                        outcomes[method_name] = TimeoutError(f"Method timed out after {timeout}s")
+                        record(method_name, outcomes[method_name])
+    finally:
+        for shm in shared_blocks:
+            shm.close()
+            shm.unlink()
 
-                result["comparison_metrics"] = {
-                    "mse": round(calculate_mse(ref_u_crop, ref_v_crop, u_crop, v_crop), 4),
-                    "mae": round(calculate_mae(ref_u_crop, ref_v_crop, u_crop, v_crop), 4),
-                    "endpoint_error": round(calculate_endpoint_error(ref_u_crop, ref_v_crop, u_crop, v_crop), 4),
-                    "angular_error": round(calculate_angular_error(ref_u_crop, ref_v_crop, u_crop, v_crop), 4)
-                }
+    # Build results in the requested method order so the reference method is stable
+    results = {method_name: results[method_name] for method_name in methods}
+
+    # Compare every pair of successful methods; the first one stays the reference for comparison_metrics
+    successful = [method_name for method_name, result in results.items() if result["success"]]
+    if len(successful) > 1:
+        with stage("comparison"):
+            _add_comparison_metrics(results, flows, successful)
 
     return results
+
+
+def _add_comparison_metrics(results: Dict[str, Dict[str, Any]], flows: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                            method_names: List[str]) -> None:
+    """
+    Add ``pairwise_metrics`` against every other method to each successful result.
+
+    The first method is the reference: the others also get their metrics
+    against it as ``comparison_metrics``.
+    """
+    # Flows normally share the output shape; crop to the common area if not
+    h = min(flows[name][0].shape[0] for name in method_names)
+    w = min(flows[name][0].shape[1] for name in method_names)
+    stack = np.empty((len(method_names), 2, h, w), dtype=np.float32)
+    for i, name in enumerate(method_names):
+        u, v = flows[name]
+        stack[i, 0] = u[:h, :w]
+        stack[i, 1] = v[:h, :w]
+
+    matrices = pairwise_flow_metrics(stack)
+    for i, name in enumerate(method_names):
+        results[name]["pairwise_metrics"] = {
+            other: {metric: round(float(matrices[metric][i, j]), 4) for metric in PAIRWISE_METRICS}
+            for j, other in enumerate(method_names) if j != i}
+        if i > 0:
+            results[name]["comparison_metrics"] = results[name]["pairwise_metrics"][method_names[0]]
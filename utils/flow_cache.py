@@ -0,0 +1,109 @@
+import os
+import hashlib
+import functools
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+# Memory budget of the shared flow cache; 0 disables it
+DEFAULT_CACHE_MB = int(os.environ.get("FLOW_CACHE_MB", "256"))
+
+
+def frame_pair_digest(frame1: np.ndarray, frame2: np.ndarray) -> str:
+    """Content hash of a frame pair, including shapes and dtypes."""
+    digest = hashlib.blake2b(digest_size=16)
+    for frame in (frame1, frame2):
+        frame = np.ascontiguousarray(frame)
+        digest.update(f"{frame.shape}{frame.dtype.str}".encode())
+        digest.update(frame.data)
+    return digest.hexdigest()
+
+
+def method_signature(method_func) -> str:
+    """Stable description of a method and its bound parameters, partials included."""
+    if isinstance(method_func, functools.partial):
+        args = ", ".join([method_signature(a) if callable(a) else repr(a) for a in method_func.args] +
+                         [f"{k}={method_signature(v) if callable(v) else repr(v)}"
+                          for k, v in sorted(method_func.keywords.items())])
+        return f"{method_signature(method_func.func)}({args})"
+    return f"{getattr(method_func, '__module__', '')}.{getattr(method_func, '__qualname__', repr(method_func))}"
+
+
+def _entry_size(value: Dict[str, Any]) -> int:
+    """Approximate memory held by a cached entry (its flow arrays)."""
+    u, v = value["flow_vectors"]
+    return u.nbytes + v.nbytes
+
+
+class FlowCache:
+    """
+    Memory-bounded LRU cache of flow results.
+
+    Entries are keyed on the content of the frame pair, the method and its
+    parameters, so identical uploads hit the cache whichever endpoint they
+    arrive through. Least recently used entries are evicted once the flow
+    arrays held exceed ``max_bytes``.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._sizes: Dict[Tuple, int] = {}
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Tuple) -> Dict[str, Any]:
+        """Return the cached result for ``key`` or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Tuple, value: Dict[str, Any]) -> None:
+        """Store a result, evicting least recently used entries to stay within budget."""
+        size = _entry_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old_key, _ = self._entries.popitem(last=False)
+                self.bytes -= self._sizes.pop(old_key)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every entry; counters are kept."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Size, hit rate and eviction counters."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions
+            }
+
+
+flow_cache = FlowCache(DEFAULT_CACHE_MB * 1024 * 1024)
@@ -0,0 +1,129 @@
+import io
+import struct
+import zlib
+import numpy as np
+from typing import Tuple
+
+FLOW_FORMATS = ("flo", "float16", "int16")
+
+# Middlebury .flo files start with the float 202021.25, which reads as "PIEH"
+FLO_MAGIC = b"PIEH"
+# Quantized flow: magic, width, height and the float32 pixels-per-unit scale, then int16 (u, v) pairs
+QUANTIZED_MAGIC = b"QF16"
+QUANTIZED_HEADER = struct.Struct("<4siif")
+NPY_MAGIC = b"\x93NUMPY"
+
+FLOW_EXTENSIONS = {"flo": ".flo", "float16": ".npy", "int16": ".qflo"}
+
+
+def _interleave(u: np.ndarray, v: np.ndarray, dtype) -> np.ndarray:
+    """Stack u and v into one (height, width, 2) array of ``dtype``."""
+    flow = np.empty(u.shape[:2] + (2,), dtype=dtype)
+    flow[..., 0] = u
+    flow[..., 1] = v
+    return flow
+
+
+def quantization_scale(u: np.ndarray, v: np.ndarray) -> float:
+    """Smallest pixels-per-unit scale that stores the flow in int16 without clipping."""
+    peak = float(max(np.abs(u).max(initial=0.0), np.abs(v).max(initial=0.0)))
+    return peak / 32767 if peak > 0 else 1.0
+
+
+def encode_flow(u: np.ndarray, v: np.ndarray, fmt: str = "flo", compress: bool = False,
+                scale: float = None) -> bytes:
+    """
+    Serialise a flow field.
+
+    Args:
+        u, v: Flow components
+        fmt: "flo" (Middlebury, float32), "float16" (.npy of shape (h, w, 2))
+            or "int16" (quantized, ``scale`` pixels per unit)
+        compress: zlib-compress the result
+        scale: Quantization step for "int16"; by default the smallest one
+            that avoids clipping
+
+    Returns:
+        The encoded bytes
+    """
+    if fmt not in FLOW_FORMATS:
+        raise ValueError(f"Unknown flow format: {fmt}")
+    h, w = u.shape[:2]
+
+    if fmt == "flo":
+        data = FLO_MAGIC + struct.pack("<ii", w, h) + _interleave(u, v, "<f4").tobytes()
+    elif fmt == "float16":
+        buffer = io.BytesIO()
+        np.save(buffer, _interleave(u, v, "<f2"))
+        data = buffer.getvalue()
+    else:
+        scale = scale or quantization_scale(u, v)
+        quantized = np.clip(np.rint(_interleave(u, v, np.float32) / scale), -32768, 32767).astype("<i2")
+        data = QUANTIZED_HEADER.pack(QUANTIZED_MAGIC, w, h, scale) + quantized.tobytes()
+
+    return zlib.compress(data) if compress else data
+
+
+def _split(flow: np.ndarray, scale: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """(u, v) from an interleaved array; quantized data is converted back to float32."""
+    if scale is not None:
+        return flow[..., 0].astype(np.float32) * scale, flow[..., 1].astype(np.float32) * scale
+    return flow[..., 0], flow[..., 1]
+
+
+def decode_flow(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse of ``encode_flow``; compression and format are detected from the content."""
+    if not data.startswith((FLO_MAGIC, QUANTIZED_MAGIC, NPY_MAGIC)):
+        data = zlib.decompress(data)
+
+    if data.startswith(FLO_MAGIC):
+        w, h = struct.unpack_from("<ii", data, 4)
+        return _split(np.frombuffer(data, dtype="<f4", offset=12).reshape(h, w, 2))
+    if data.startswith(QUANTIZED_MAGIC):
+        _, w, h, scale = QUANTIZED_HEADER.unpack_from(data)
+        return _split(np.frombuffer(data, dtype="<i2", offset=QUANTIZED_HEADER.size).reshape(h, w, 2), scale)
+    return _split(np.load(io.BytesIO(data)))
+
+
+def save_flow(path: str, u: np.ndarray, v: np.ndarray, fmt: str = "flo", compress: bool = False,
+              scale: float = None) -> None:
+    """Write a flow field to ``path`` with ``encode_flow``."""
+    with open(path, "wb") as f:
+        f.write(encode_flow(u, v, fmt, compress, scale))
+
+
+def load_flow(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read a flow field written by ``save_flow`` (or any Middlebury .flo file).
+
+    Uncompressed files are memory-mapped, so u and v are views into the
+    file and nothing is read until used; float16 data stays float16.
+    Quantized int16 data is scaled back to float32, which does read it
+    (``load_quantized_flow`` keeps it mapped). Compressed files are
+    decompressed into memory.
+    """
+    with open(path, "rb") as f:
+        head = f.read(QUANTIZED_HEADER.size)
+
+    if head.startswith(FLO_MAGIC):
+        w, h = struct.unpack_from("<ii", head, 4)
+        return _split(np.memmap(path, dtype="<f4", mode="r", offset=12, shape=(h, w, 2)))
+    if head.startswith(QUANTIZED_MAGIC):
+        _, w, h, scale = QUANTIZED_HEADER.unpack(head)
+        return _split(np.memmap(path, dtype="<i2", mode="r", offset=QUANTIZED_HEADER.size, shape=(h, w, 2)), scale)
+    if head.startswith(NPY_MAGIC):
+        return _split(np.load(path, mmap_mode="r"))
+
+    with open(path, "rb") as f:
+        return decode_flow(f.read())
+
+
+def load_quantized_flow(path: str) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Memory-mapped int16 (u, v) of an uncompressed quantized file, with the scale to apply."""
+    with open(path, "rb") as f:
+        head = f.read(QUANTIZED_HEADER.size)
+    if not head.startswith(QUANTIZED_MAGIC):
+        raise ValueError(f"Not an uncompressed quantized flow file: {path}")
+    _, w, h, scale = QUANTIZED_HEADER.unpack(head)
+    flow = np.memmap(path, dtype="<i2", mode="r", offset=QUANTIZED_HEADER.size, shape=(h, w, 2))
+    return flow[..., 0], flow[..., 1], scale
@@ -0,0 +1,131 @@
+import threading
+import numpy as np
+import cv2
+from collections import defaultdict
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Tuple
+
+
+class FramePairContext:
+    """
+    Lazily computed intermediates shared by every method run on one frame pair.
+
+    Each intermediate (float frames, gradients, pyramids, ...) is computed
+    at most once, on first request, and handed to every later caller.
+    Hits and misses are counted per intermediate so the saving can be
+    reported alongside method results. The cache is safe to share between
+    threads; ``view()`` gives each caller its own counters.
+    """
+
+    def __init__(self, frame1: np.ndarray, frame2: np.ndarray, _shared: "FramePairContext" = None):
+        self.frame1 = frame1
+        self.frame2 = frame2
+        if _shared is None:
+            self._cache: Dict[str, Any] = {}
+            self._key_locks: Dict[str, threading.Lock] = {}
+            self._lock = threading.Lock()
+        else:
+            self._cache = _shared._cache
+            self._key_locks = _shared._key_locks
+            self._lock = _shared._lock
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+
+    def view(self) -> "FramePairContext":
+        """A context sharing this cache but counting its own hits and misses."""
+        return FramePairContext(self.frame1, self.frame2, _shared=self)
+
+    def get(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached intermediate for ``key``, computing it on first use."""
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Only callers after the same key wait for each other
+        with key_lock:
+            if key in self._cache:
+                self.hits[key] += 1
+                return self._cache[key]
+            self.misses[key] += 1
+            value = compute()
+            self._cache[key] = value
+            return value
+
+    def frame_derived(self, index: int, name: str, compute: Callable[[], Any]) -> Any:
+        """Intermediate computed from frame ``index`` (1 or 2) alone.
+
+        Such intermediates are keyed ``<name>_frame<index>`` and carried
+        over to the next pair of a sequence by ``advance()``.
+        """
+        return self.get(f"{name}_frame{index}", compute)
+
+    def float_frame(self, index: int) -> np.ndarray:
+        """Frame ``index`` (1 or 2) converted to float32."""
+        frame = self.frame1 if index == 1 else self.frame2
+        return self.frame_derived(index, "float", lambda: frame.astype(np.float32))
+
+    def float_frames(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Both frames converted to float32."""
+        return self.float_frame(1), self.float_frame(2)
+
+    def pyramid_frame(self, index: int, level: int) -> np.ndarray:
+        """Level ``level`` of the Gaussian pyramid of float32 frame ``index`` (0 is full resolution)."""
+        if level == 0:
+            return self.float_frame(index)
+        return self.frame_derived(index, f"pyramid_level{level}",
+                                  lambda: cv2.pyrDown(self.pyramid_frame(index, level - 1)))
+
+    def pyramid_level(self, level: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Level ``level`` of the Gaussian pyramids of both float32 frames (0 is full resolution)."""
+        return self.pyramid_frame(1, level), self.pyramid_frame(2, level)
+
+    def pyramids(self, num_levels: int) -> Tuple[List[np.ndarray], List[np.ndarray]]:
+        """Gaussian pyramids (finest level first) of both float32 frames."""
+        levels = [self.pyramid_level(lvl) for lvl in range(num_levels)]
+        return [l[0] for l in levels], [l[1] for l in levels]
+
+    def advance(self, next_frame: np.ndarray) -> "FramePairContext":
+        """Context for the next pair of a sequence, (frame2, next_frame).
+
+        Everything derived from frame 2 alone (float conversion, pyramid
+        levels, per-frame filter responses) becomes the new frame 1's,
+        so consecutive pairs only compute those for the incoming frame.
+        """
+        context = FramePairContext(self.frame2, next_frame)
+        with self._lock:
+            carried = {key[:-len("_frame2")] + "_frame1": value
+                       for key, value in self._cache.items() if key.endswith("_frame2")}
+        context._cache.update(carried)
+        return context
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit and miss counts per intermediate."""
+        return {"hits": dict(self.hits), "misses": dict(self.misses)}
+
+
+def share_frame(frame: np.ndarray) -> Tuple[shared_memory.SharedMemory, Tuple[str, Tuple[int, ...], str]]:
+    """Copy a frame into a new shared memory block; returns the block and its (name, shape, dtype) spec."""
+    frame = np.ascontiguousarray(frame)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, frame.nbytes))
+    np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)[:] = frame
+    return shm, (shm.name, frame.shape, frame.dtype.str)
+
+
+def attach_frame(spec: Tuple[str, Tuple[int, ...], str]) -> Tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Attach to a frame created by ``share_frame`` without copying it.
+
+    The returned array is a view into the block; drop it before calling
+    ``close()`` on the block.
+    """
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def close_frames(*blocks: shared_memory.SharedMemory) -> None:
+    """Close attached shared memory blocks, tolerating views kept alive by a traceback."""
+    for shm in blocks:
+        try:
+            shm.close()
+        except BufferError:
+            # The mapping is released once the last view is garbage collected
+            pass
@@ -0,0 +1,95 @@
+import os
+import time
+import uuid
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional
+
+# Seconds a finished job and its results stay available
+DEFAULT_JOB_TTL = float(os.environ.get("FLOW_JOB_TTL", "300"))
+
+FINISHED_STATES = ("done", "failed", "cancelled")
+
+
+class Job:
+    """
+    One asynchronous comparison and the ordered events it has produced.
+
+    Events are appended from worker threads and read by any number of
+    subscribers on the event loop; each append wakes the subscribers.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.id = uuid.uuid4().hex
+        self.status = "queued"
+        self.events: List[Dict[str, Any]] = []
+        self.results: Dict[str, Any] = {}
+        self.cancel_event = threading.Event()
+        self.future: Optional[Future] = None
+        self.created = time.monotonic()
+        self.finished: Optional[float] = None
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def _notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def publish(self, event: str, data: Dict[str, Any]) -> None:
+        """Append an event; safe to call from any thread."""
+        self.events.append({"event": event, "data": data})
+        self._loop.call_soon_threadsafe(self._notify)
+
+    def finish(self, status: str, data: Dict[str, Any] = None) -> None:
+        """Mark the job finished and publish the final event."""
+        self.status = status
+        self.finished = time.monotonic()
+        self.publish(status, dict(data or {}, status=status))
+
+    async def stream(self):
+        """Yield every event, past and future, until the job has finished."""
+        index = 0
+        while True:
+            changed = self._changed
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.status in FINISHED_STATES and index >= len(self.events):
+                return
+            await changed.wait()
+
+    def summary(self) -> Dict[str, Any]:
+        """Status and the per-method results received so far."""
+        return {"job_id": self.id, "status": self.status, "results": self.results}
+
+
+class JobManager:
+    """Registry of jobs; finished jobs are dropped ``ttl`` seconds after they end."""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished is not None and now - job.finished > self.ttl]:
+            del self._jobs[job_id]
+
+    def create(self, loop: asyncio.AbstractEventLoop) -> Job:
+        """Register a new queued job."""
+        job = Job(loop)
+        with self._lock:
+            self._expire(time.monotonic())
+            self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job for ``job_id``, or None if unknown or expired."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return self._jobs.get(job_id)
+
+
+job_manager = JobManager(DEFAULT_JOB_TTL)
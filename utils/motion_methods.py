@@ -1,12 +1,17 @@
+import threading
+import time
 import numpy as np
 import cv2
-from scipy.signal import convolve2d
-from typing import Tuple
+from scipy.interpolate import LinearNDInterpolator, NearestNDInterpolator
+from scipy.spatial import QhullError
+from typing import Tuple, Dict, Any
+from utils.frame_context import FramePairContext
+from utils.quality import resize_flow
 
 # Try to import scikit-image optical flow functions (may not be available in all versions)
 try:
     from skimage.color import rgb2gray
-    from skimage.registration._optical_flow import optical_flow_ilk
+    from skimage.registration import optical_flow_ilk, optical_flow_tvl1
 
     SKIMAGE_FLOW_AVAILABLE = True
 except ImportError as e:
@@ -20,89 +25,313 @@ except ImportError as e:
             return np.dot(image[..., :3], [0.2989, 0.5870, 0.1140])
         return image
 
+# Private scikit-image helpers used to stop iLK at a deadline; without them iLK simply runs to completion
+try:
+    from skimage.registration._optical_flow import _ilk
+    from skimage.registration._optical_flow_utils import _coarse_to_fine
+
+    SKIMAGE_ILK_INTERNALS_AVAILABLE = True
+except ImportError:
+    SKIMAGE_ILK_INTERNALS_AVAILABLE = False
+
+# OpenCV contrib provides its own TV-L1; register it only when installed
+OPENCV_TVL1_AVAILABLE = hasattr(cv2, "optflow") and hasattr(cv2.optflow, "DualTVL1OpticalFlow_create")
+
 # Self-made implementations
 
 
-def horn_schunck_custom(im1: np.ndarray, im2: np.ndarray, alpha: float = 1.0, num_iter: int = 100) -> Tuple[np.ndarray, np.ndarray]:
-    """Custom implementation of Horn-Schunck optical flow."""
-    im1 = im1.astype(np.float32)
-    im2 = im2.astype(np.float32)
-
-    kernel_x = np.array([[-1, 1], [-1, 1]]) * 0.25
-    kernel_y = np.array([[-1, -1], [1, 1]]) * 0.25
-    kernel_t = np.ones((2, 2)) * 0.25
-
-    Ix = convolve2d(im1, kernel_x, boundary='symm', mode='same') + \
-        convolve2d(im2, kernel_x, boundary='symm', mode='same')
-    Iy = convolve2d(im1, kernel_y, boundary='symm', mode='same') + \
-        convolve2d(im2, kernel_y, boundary='symm', mode='same')
-    It = convolve2d(im2, kernel_t, boundary='symm', mode='same') - \
-        convolve2d(im1, kernel_t, boundary='symm', mode='same')
-
-    u = np.zeros_like(im1)
-    v = np.zeros_like(im1)
-
-    kernel_avg = np.array([
-        [0, 0.25, 0],
-        [0.25, 0, 0.25],
-        [0, 0.25, 0]]
-    )
-
-    for _ in range(num_iter):
-        u_avg = convolve2d(u, kernel_avg, boundary='symm', mode='same')
-        v_avg = convolve2d(v, kernel_avg, boundary='symm', mode='same')
-        numerator = (Ix * u_avg + Iy * v_avg + It)
-        denominator = (alpha**2 + Ix**2 + Iy**2)
-        term = numerator / denominator
-        u = u_avg - Ix * term
-        v = v_avg - Iy * term
+_HS_KERNEL_X = np.array([[-1, 1], [-1, 1]], dtype=np.float32) * 0.25
+_HS_KERNEL_Y = np.array([[-1, -1], [1, 1]], dtype=np.float32) * 0.25
+_HS_KERNEL_T = np.ones((2, 2), dtype=np.float32) * 0.25
+_HS_KERNEL_AVG = np.array([
+    [0, 0.25, 0],
+    [0.25, 0, 0.25],
+    [0, 0.25, 0]], dtype=np.float32
+)
+
+
+def _convolve_same(image: np.ndarray, kernel: np.ndarray, dst: np.ndarray = None) -> np.ndarray:
+    """Equivalent of convolve2d(image, kernel, boundary='symm', mode='same') for 2x2 and 3x3 kernels."""
+    flipped = np.ascontiguousarray(kernel[::-1, ::-1])
+    return cv2.filter2D(image, cv2.CV_32F, flipped, dst=dst, anchor=(1, 1),
+                        borderType=cv2.BORDER_REFLECT)
+
+
+def _horn_schunck_filters(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Responses of one frame to the Horn-Schunck x, y and t kernels."""
+    image = image.astype(np.float32)
+    return (_convolve_same(image, _HS_KERNEL_X), _convolve_same(image, _HS_KERNEL_Y),
+            _convolve_same(image, _HS_KERNEL_T))
+
+
+def _horn_schunck_derivatives(filters1: Tuple[np.ndarray, ...],
+                              filters2: Tuple[np.ndarray, ...]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Spatial and temporal derivatives used by Horn-Schunck, from both frames' filter responses."""
+    x1, y1, t1 = filters1
+    x2, y2, t2 = filters2
+    return x1 + x2, y1 + y2, t2 - t1
+
+
+def deadline_passed(deadline: float = None) -> bool:
+    """Whether a ``time.perf_counter()`` deadline has been reached (None never expires)."""
+    return deadline is not None and time.perf_counter() >= deadline
+
+
+def _horn_schunck_iterate(Ix: np.ndarray, Iy: np.ndarray, It: np.ndarray, alpha: float,
+                          u: np.ndarray, v: np.ndarray, num_iter: int, tol: float = 0.0,
+                          deadline: float = None) -> Tuple[np.ndarray, np.ndarray, int, float, bool]:
+    """Run Jacobi iterations in preallocated buffers.
+
+    Stops early once the RMS flow update drops below ``tol`` (``tol=0``
+    always runs ``num_iter`` iterations) or once ``deadline`` passes.
+    Returns the flow, the number of iterations performed, the final RMS
+    update and whether the deadline cut the run short.
+    """
+    u = u.astype(np.float32, copy=True)
+    v = v.astype(np.float32, copy=True)
+    u_avg = np.empty_like(u)
+    v_avg = np.empty_like(v)
+    term = np.empty_like(u)
+    tmp = np.empty_like(u)
+    inv_denominator = 1.0 / (alpha**2 + Ix**2 + Iy**2)
+
+    iterations = 0
+    residual = 0.0
+    truncated = False
+    for iterations in range(1, num_iter + 1):
+        _convolve_same(u, _HS_KERNEL_AVG, dst=u_avg)
+        _convolve_same(v, _HS_KERNEL_AVG, dst=v_avg)
+
+        # term = (Ix * u_avg + Iy * v_avg + It) / (alpha^2 + Ix^2 + Iy^2)
+        np.multiply(Ix, u_avg, out=term)
+        np.multiply(Iy, v_avg, out=tmp)
+        term += tmp
+        term += It
+        term *= inv_denominator
+
+        # Update is u_new - u = (u_avg - u) - Ix * term, measured before overwriting u
+        np.multiply(Ix, term, out=tmp)
+        np.subtract(u_avg, tmp, out=u_avg)
+        np.multiply(Iy, term, out=tmp)
+        np.subtract(v_avg, tmp, out=v_avg)
+
+        truncated = iterations < num_iter and deadline_passed(deadline)
+        last = iterations == num_iter or truncated
+        if tol > 0 or last:
+            np.subtract(u_avg, u, out=tmp)
+            sq = float(np.vdot(tmp, tmp))
+            np.subtract(v_avg, v, out=tmp)
+            sq += float(np.vdot(tmp, tmp))
+            residual = float(np.sqrt(sq / u.size))
+
+        u, u_avg = u_avg, u
+        v, v_avg = v_avg, v
+
+        if tol > 0 and residual < tol or truncated:
+            break
+
+    return u, v, iterations, residual, truncated
+
+
+def _hs_level_derivatives(context: FramePairContext, level: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Horn-Schunck derivatives of one pyramid level, shared through the context."""
+    key = "hs_derivatives" if level == 0 else f"hs_derivatives_level{level}"
+
+    def build():
+        # Per-frame filter responses are reused by the next pair of a sequence
+        filters = [context.frame_derived(index, f"hs_filters_level{level}",
+                                         lambda index=index: _horn_schunck_filters(context.pyramid_frame(index, level)))
+                   for index in (1, 2)]
+        return _horn_schunck_derivatives(*filters)
+    return context.get(key, build)
+
+
+def horn_schunck_custom(im1: np.ndarray, im2: np.ndarray, alpha: float = 1.0, num_iter: int = 100,
+                        tol: float = 0.0, info: Dict[str, Any] = None, context: FramePairContext = None,
+                        deadline: float = None,
+                        initial_flow: Tuple[np.ndarray, np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Custom implementation of Horn-Schunck optical flow.
+
+    With ``tol > 0`` iteration stops as soon as the RMS flow update falls
+    below ``tol``; at ``deadline`` (a ``time.perf_counter()`` value) it
+    stops and returns the flow so far. The iteration count, final residual
+    and any truncation are written to ``info`` when a dict is passed.
+    ``initial_flow`` warm-starts the iteration, e.g. from the previous
+    pair of a video.
+    """
+    if context is None:
+        context = FramePairContext(im1, im2)
+    Ix, Iy, It = _hs_level_derivatives(context, 0)
+
+    if initial_flow is not None:
+        u, v = [np.array(f, dtype=np.float32) for f in resize_flow(*initial_flow, Ix.shape)]
+    else:
+        u = np.zeros_like(Ix)
+        v = np.zeros_like(Ix)
+    u, v, iterations, residual, truncated = _horn_schunck_iterate(
+        Ix, Iy, It, alpha, u, v, num_iter, tol, deadline)
+
+    if info is not None:
+        info["iterations"] = iterations
+        info["residual"] = residual
+        if truncated:
+            info["truncated"] = True
+            info["truncated_at_iteration"] = iterations
     return u, v
 
 
-def lucas_kanade_dense_custom(im1: np.ndarray, im2: np.ndarray, window_size: int = 5) -> Tuple[np.ndarray, np.ndarray]:
-    """Custom dense Lucas-Kanade implementation."""
-    im1 = im1.astype(np.float32)
-    im2 = im2.astype(np.float32)
+def horn_schunck_multigrid_custom(im1: np.ndarray, im2: np.ndarray, alpha: float = 1.0, num_levels: int = 4,
+                                  num_iter: int = 50, tol: float = 1e-3, info: Dict[str, Any] = None,
+                                  context: FramePairContext = None,
+                                  deadline: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Coarse-to-fine Horn-Schunck solver.
+
+    The problem is solved on a Gaussian pyramid starting at the coarsest
+    level; each finer level is warm-started from the upsampled (and
+    rescaled) flow of the level below, so far fewer fine-level iterations
+    are needed to converge. Once ``deadline`` passes the remaining levels
+    only upsample the current flow.
+    """
+    if context is None:
+        context = FramePairContext(im1, im2)
+
+    # Stop coarsening once a level would drop below 16 pixels
+    levels = 1
+    size = min(im1.shape[:2])
+    while levels < num_levels and (size + 1) // 2 >= 16:
+        size = (size + 1) // 2
+        levels += 1
+
+    u = v = None
+    total_iterations = 0
+    level_iterations = []
+    residual = 0.0
+    truncated_at = None
+    for lvl in reversed(range(levels)):
+        Ix, Iy, It = _hs_level_derivatives(context, lvl)
+        h, w = Ix.shape
+        if u is None:
+            u = np.zeros((h, w), dtype=np.float32)
+            v = np.zeros((h, w), dtype=np.float32)
+        else:
+            u = cv2.resize(u, (w, h), interpolation=cv2.INTER_LINEAR) * 2
+            v = cv2.resize(v, (w, h), interpolation=cv2.INTER_LINEAR) * 2
+
+        if truncated_at is not None:
+            continue
+
+        u, v, iterations, residual, truncated = _horn_schunck_iterate(
+            Ix, Iy, It, alpha, u, v, num_iter, tol, deadline)
+        total_iterations += iterations
+        level_iterations.append(iterations)
+        if truncated or (lvl > 0 and deadline_passed(deadline)):
+            truncated_at = (lvl, iterations)
+
+    if info is not None:
+        info["iterations"] = total_iterations
+        info["level_iterations"] = level_iterations
+        info["residual"] = residual
+        if truncated_at is not None:
+            info["truncated"] = True
+            info["truncated_at_level"], info["truncated_at_iteration"] = truncated_at
+    return u, v
 
-    Ix = cv2.Sobel(im1, cv2.CV_32F, 1, 0, ksize=3) + \
-        cv2.Sobel(im2, cv2.CV_32F, 1, 0, ksize=3)
-    Iy = cv2.Sobel(im1, cv2.CV_32F, 0, 1, ksize=3) + \
-        cv2.Sobel(im2, cv2.CV_32F, 0, 1, ksize=3)
-    It = im2 - im1
 
-    half_w = window_size // 2
-    u = np.zeros(im1.shape, dtype=np.float32)
-    v = np.zeros(im1.shape, dtype=np.float32)
+def _solve_structure_tensor(Ix: np.ndarray, Iy: np.ndarray, It: np.ndarray, window_size: int,
+                            min_eigenvalue: float) -> Tuple[np.ndarray, np.ndarray]:
+    """Solve the Lucas-Kanade 2x2 normal equations for every pixel at once.
 
-    h, w = im1.shape
-    for y in range(half_w, h - half_w):
-        for x in range(half_w, w - half_w):
-            Ix_win = Ix[y-half_w:y+half_w+1, x-half_w:x+half_w+1].flatten()
-            Iy_win = Iy[y-half_w:y+half_w+1, x-half_w:x+half_w+1].flatten()
-            It_win = It[y-half_w:y+half_w+1, x-half_w:x+half_w+1].flatten()
+    The window sums of the gradient products are computed with an unnormalised
+    box filter and each system is inverted in closed form. Pixels whose
+    structure tensor has a smallest eigenvalue below ``min_eigenvalue`` are
+    ill-conditioned and get zero flow.
+    """
+    Ix = Ix.astype(np.float64)
+    Iy = Iy.astype(np.float64)
+    It = It.astype(np.float64)
 
-            A = np.stack((Ix_win, Iy_win), axis=1)
-            b = -It_win.reshape(-1, 1)
+    def window_sum(a):
+        return cv2.boxFilter(a, cv2.CV_64F, (window_size, window_size),
+                             normalize=False, borderType=cv2.BORDER_CONSTANT)
 
-            nu, _, _, _ = np.linalg.lstsq(A, b, rcond=None)
-            u[y, x] = nu[0]
-            v[y, x] = nu[1]
+    Sxx = window_sum(Ix * Ix)
+    Sxy = window_sum(Ix * Iy)
+    Syy = window_sum(Iy * Iy)
+    Sxt = window_sum(Ix * It)
+    Syt = window_sum(Iy * It)
 
-    return u, v
+    det = Sxx * Syy - Sxy * Sxy
+    half_trace = (Sxx + Syy) / 2
+    min_eig = half_trace - np.sqrt(((Sxx - Syy) / 2) ** 2 + Sxy ** 2)
+    valid = (min_eig > min_eigenvalue) & (det > 0)
 
+    safe_det = np.where(valid, det, 1.0)
+    u = np.where(valid, (Sxy * Syt - Syy * Sxt) / safe_det, 0.0)
+    v = np.where(valid, (Sxy * Sxt - Sxx * Syt) / safe_det, 0.0)
 
-def pyr_lucas_kanade_custom(im1: np.ndarray, im2: np.ndarray, num_levels: int = 3, window_size: int = 5) -> Tuple[np.ndarray, np.ndarray]:
-    """Custom pyramidal Lucas-Kanade implementation."""
-    pyr1 = [im1]
-    pyr2 = [im2]
-    for _ in range(1, num_levels):
-        pyr1.append(cv2.pyrDown(pyr1[-1]))
-        pyr2.append(cv2.pyrDown(pyr2[-1]))
+    # Keep the same border convention as the per-pixel solver
+    half_w = window_size // 2
+    if half_w > 0:
+        for arr in (u, v):
+            arr[:half_w, :] = 0
+            arr[-half_w:, :] = 0
+            arr[:, :half_w] = 0
+            arr[:, -half_w:] = 0
+
+    return u.astype(np.float32), v.astype(np.float32)
+
+
+def _sobel_gradients(image: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sobel x and y responses of one frame."""
+    return cv2.Sobel(image, cv2.CV_32F, 1, 0, ksize=3), cv2.Sobel(image, cv2.CV_32F, 0, 1, ksize=3)
+
+
+def _lucas_kanade_gradients(context: FramePairContext) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Summed Sobel gradients and temporal difference used by Lucas-Kanade, shared through the context."""
+    def build():
+        # Per-frame Sobel responses are reused by the next pair of a sequence
+        (x1, y1), (x2, y2) = [context.frame_derived(index, "sobel",
+                                                    lambda index=index: _sobel_gradients(context.float_frame(index)))
+                              for index in (1, 2)]
+        f1, f2 = context.float_frames()
+        return x1 + x2, y1 + y2, f2 - f1
+    return context.get("lk_gradients", build)
+
+
+def lucas_kanade_dense_custom(im1: np.ndarray, im2: np.ndarray, window_size: int = 5,
+                              min_eigenvalue: float = 1e-3,
+                              context: FramePairContext = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Custom dense Lucas-Kanade implementation (vectorised structure-tensor solve)."""
+    if context is None:
+        context = FramePairContext(im1, im2)
+    Ix, Iy, It = _lucas_kanade_gradients(context)
+
+    return _solve_structure_tensor(Ix, Iy, It, window_size, min_eigenvalue)
+
+
+def pyr_lucas_kanade_custom(im1: np.ndarray, im2: np.ndarray, num_levels: int = 3, window_size: int = 5,
+                            context: FramePairContext = None, deadline: float = None,
+                            info: Dict[str, Any] = None,
+                            initial_flow: Tuple[np.ndarray, np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Custom pyramidal Lucas-Kanade implementation.
+
+    Once ``deadline`` passes, the remaining finer levels only upsample the
+    current flow; the level reached is written to ``info``. ``initial_flow``
+    is downsampled to the coarsest level and refined from there instead of
+    starting from zero.
+    """
+    if context is None:
+        context = FramePairContext(im1, im2)
+    pyr1, pyr2 = context.pyramids(num_levels)
 
     h_coarse, w_coarse = pyr1[-1].shape
-    u = np.zeros((h_coarse, w_coarse), dtype=np.float32)
-    v = np.zeros((h_coarse, w_coarse), dtype=np.float32)
+    if initial_flow is not None:
+        u, v = [np.array(f, dtype=np.float32) for f in resize_flow(*initial_flow, (h_coarse, w_coarse))]
+    else:
+        u = np.zeros((h_coarse, w_coarse), dtype=np.float32)
+        v = np.zeros((h_coarse, w_coarse), dtype=np.float32)
 
+    truncated_at = None
     for lvl in reversed(range(num_levels)):
         if lvl < num_levels - 1:
             u = cv2.pyrUp(u) * 2
@@ -110,6 +339,11 @@ def pyr_lucas_kanade_custom(im1: np.ndarray, im2: np.ndarray, num_levels: int =
             u = cv2.resize(u, (pyr1[lvl].shape[1], pyr1[lvl].shape[0]))
             v = cv2.resize(v, (pyr1[lvl].shape[1], pyr1[lvl].shape[0]))
 
+        if truncated_at is None and deadline_passed(deadline):
+            truncated_at = lvl
+        if truncated_at is not None:
+            continue
+
         h, w = pyr1[lvl].shape
         grid_x, grid_y = np.meshgrid(np.arange(w), np.arange(h))
         map_x = (grid_x + u).astype(np.float32)
@@ -122,52 +356,366 @@ def pyr_lucas_kanade_custom(im1: np.ndarray, im2: np.ndarray, num_levels: int =
         u += du
         v += dv
 
+    if info is not None and truncated_at is not None:
+        info["truncated"] = True
+        info["truncated_at_level"] = truncated_at
     return u, v
 
 
-def ssd_block_matching_custom(frame1: np.ndarray, frame2: np.ndarray, block_size: int = 16, search_range: int = 4) -> Tuple[np.ndarray, np.ndarray]:
-    """Custom SSD block matching implementation."""
-    h, w = frame1.shape
+BLOCK_MATCHING_COSTS = ("ssd", "sad", "ncc")
+
+
+def _block_grid(shape: Tuple[int, int], block_size: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-left corners of the blocks evaluated by block matching."""
+    h, w = shape
+    return np.arange(0, h - block_size, block_size), np.arange(0, w - block_size, block_size)
+
+
+def _block_sum(a: np.ndarray, block_size: int) -> np.ndarray:
+    """Sum each non-overlapping block_size x block_size tile of ``a``."""
+    nby, nbx = a.shape[0] // block_size, a.shape[1] // block_size
+    # Area interpolation with an integer factor is an exact block mean and much faster than reshape().sum()
+    return cv2.resize(a, (nbx, nby), interpolation=cv2.INTER_AREA) * (block_size * block_size)
+
+
+def _block_cost_volume(f1: np.ndarray, f2: np.ndarray, block_size: int, search_range: int,
+                       cost: str) -> np.ndarray:
+    """Matching cost of every block for every displacement.
+
+    Returns an array of shape (2r+1, 2r+1, n_blocks_y, n_blocks_x) indexed
+    by (dy + r, dx + r). Each displacement is evaluated for all blocks at
+    once by shifting the whole second frame and summing per block.
+    Displacements that leave the frame are set to ``inf``. Lower is better
+    for every cost (NCC is stored as ``1 - ncc``).
+    """
+    h, w = f1.shape
+    ys, xs = _block_grid((h, w), block_size)
+    nby, nbx = len(ys), len(xs)
+    H, W = nby * block_size, nbx * block_size
+    r = search_range
+    n = block_size * block_size
+
+    ref = f1[:H, :W]
+    padded = cv2.copyMakeBorder(f2, r, r, r, r, cv2.BORDER_REPLICATE)
+    diff = np.empty_like(ref)
+
+    if cost == "ncc":
+        S1 = _block_sum(ref, block_size)
+        var1 = _block_sum(ref * ref, block_size) - S1 * S1 / n
+
+    offsets = np.arange(-r, r + 1)
+    valid_y = ((ys[None, :] + offsets[:, None]) >= 0) & ((ys[None, :] + offsets[:, None]) < h - block_size)
+    valid_x = ((xs[None, :] + offsets[:, None]) >= 0) & ((xs[None, :] + offsets[:, None]) < w - block_size)
+
+    costs = np.full((2 * r + 1, 2 * r + 1, nby, nbx), np.inf, dtype=np.float32)
+    for iy, dy in enumerate(offsets):
+        if not valid_y[iy].any():
+            continue
+        for ix, dx in enumerate(offsets):
+            valid = valid_y[iy][:, None] & valid_x[ix][None, :]
+            if not valid.any():
+                continue
+            candidate = padded[r + dy:r + dy + H, r + dx:r + dx + W]
+
+            if cost == "ssd":
+                np.subtract(ref, candidate, out=diff)
+                np.multiply(diff, diff, out=diff)
+                score = _block_sum(diff, block_size)
+            elif cost == "sad":
+                np.subtract(ref, candidate, out=diff)
+                np.abs(diff, out=diff)
+                score = _block_sum(diff, block_size)
+            else:
+                S2 = _block_sum(candidate, block_size)
+                var2 = _block_sum(candidate * candidate, block_size) - S2 * S2 / n
+                np.multiply(ref, candidate, out=diff)
+                cov = _block_sum(diff, block_size) - S1 * S2 / n
+                denom = np.sqrt(np.maximum(var1 * var2, 0))
+                ncc = np.where(denom > 1e-6, cov / np.maximum(denom, 1e-6), 0.0)
+                score = 1.0 - ncc
+
+            costs[iy, ix] = np.where(valid, score, np.inf)
+
+    return costs
+
+
+def _parabolic_offset(c_minus: np.ndarray, c0: np.ndarray, c_plus: np.ndarray) -> np.ndarray:
+    """Sub-pixel offset of the minimum of a parabola through three costs."""
+    denom = c_minus - 2 * c0 + c_plus
+    usable = np.isfinite(c_minus) & np.isfinite(c_plus) & (denom > 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        offset = np.where(usable, 0.5 * (c_minus - c_plus) / denom, 0.0)
+    return np.clip(offset, -0.5, 0.5)
+
+
+_SEARCH_PATTERNS = {
+    "diamond": ([(0, -2), (0, 2), (-2, 0), (2, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)],
+                [(0, -1), (0, 1), (-1, 0), (1, 0)]),
+    "hexagon": ([(0, -2), (0, 2), (-2, -1), (-2, 1), (2, -1), (2, 1)],
+                [(0, -1), (0, 1), (-1, 0), (1, 0)]),
+}
+
+BLOCK_SEARCH_STRATEGIES = ("exhaustive", "three_step", "diamond", "hexagon")
+
+
+def _candidate_cost(block: np.ndarray, candidate: np.ndarray, cost: str) -> float:
+    """Mean per-pixel matching cost of one candidate block (lower is better)."""
+    diff = block - candidate
+    if cost == "ssd":
+        return float(np.mean(diff * diff))
+    if cost == "sad":
+        return float(np.mean(np.abs(diff)))
+    b = block - block.mean()
+    c = candidate - candidate.mean()
+    denom = np.sqrt(float(np.sum(b * b)) * float(np.sum(c * c)))
+    return 1.0 - (float(np.sum(b * c)) / denom if denom > 1e-6 else 0.0)
+
+
+def _predictive_block_search(f1: np.ndarray, f2: np.ndarray, block_size: int, search_range: int, cost: str,
+                             search: str, stop_cost: float, subpixel: bool,
+                             deadline: float = None) -> Tuple[np.ndarray, np.ndarray, int, int]:
+    """Three-step, diamond or hexagon search seeded from neighbouring blocks.
+
+    Blocks are processed in raster order so each one can start from the
+    zero vector or the component-wise median of its left, top and
+    top-right neighbours, whichever is cheaper. The search stops as soon
+    as a candidate costs less than ``stop_cost`` (mean per-pixel cost).
+    Once ``deadline`` passes, the remaining block rows keep zero motion.
+    Returns the displacements per block, the number of candidate
+    evaluations and the block rows searched.
+    """
+    h, w = f1.shape
+    ys, xs = _block_grid((h, w), block_size)
+    dx_out = np.zeros((len(ys), len(xs)), dtype=np.float32)
+    dy_out = np.zeros((len(ys), len(xs)), dtype=np.float32)
+    evaluations = 0
+
+    rows_done = 0
+    for by, y in enumerate(ys):
+        if deadline_passed(deadline):
+            break
+        rows_done += 1
+        for bx, x in enumerate(xs):
+            block = f1[y:y+block_size, x:x+block_size]
+            scores = {}
+
+            def evaluate(dy, dx):
+                nonlocal evaluations
+                if (dy, dx) in scores:
+                    return scores[(dy, dx)]
+                ny, nx = y + dy, x + dx
+                if abs(dy) > search_range or abs(dx) > search_range or \
+                        not (0 <= ny < h - block_size and 0 <= nx < w - block_size):
+                    score = float('inf')
+                else:
+                    score = _candidate_cost(block, f2[ny:ny+block_size, nx:nx+block_size], cost)
+                    evaluations += 1
+                scores[(dy, dx)] = score
+                return score
+
+            # Seed from the zero vector and the median of causal neighbours
+            neighbours = [(by, bx - 1), (by - 1, bx), (by - 1, bx + 1)]
+            neighbours = [(j, i) for j, i in neighbours if 0 <= j < len(ys) and 0 <= i < len(xs)]
+            best = (0, 0)
+            best_score = evaluate(0, 0)
+            if neighbours:
+                pred = (int(np.median([dy_out[j, i] for j, i in neighbours])),
+                        int(np.median([dx_out[j, i] for j, i in neighbours])))
+                if evaluate(*pred) < best_score:
+                    best, best_score = pred, scores[pred]
+
+            def refine(center, center_score, pattern):
+                """Move to the best point of ``pattern`` until the center wins."""
+                while center_score >= stop_cost:
+                    moved = False
+                    for oy, ox in pattern:
+                        cand = (center[0] + oy, center[1] + ox)
+                        if evaluate(*cand) < center_score:
+                            center, center_score, moved = cand, scores[cand], True
+                    if not moved:
+                        break
+                return center, center_score
+
+            if best_score >= stop_cost:
+                if search == "three_step":
+                    step = 1 << max(0, int(np.ceil(np.log2(search_range + 1))) - 1)
+                    while step >= 1 and best_score >= stop_cost:
+                        pattern = [(oy * step, ox * step) for oy in (-1, 0, 1) for ox in (-1, 0, 1)
+                                   if oy or ox]
+                        center = best
+                        for oy, ox in pattern:
+                            cand = (center[0] + oy, center[1] + ox)
+                            if evaluate(*cand) < best_score:
+                                best, best_score = cand, scores[cand]
+                        step //= 2
+                else:
+                    large, small = _SEARCH_PATTERNS[search]
+                    best, best_score = refine(best, best_score, large)
+                    best, best_score = refine(best, best_score, small)
+
+            dy, dx = float(best[0]), float(best[1])
+            if subpixel:
+                c0 = evaluate(*best)
+                dy += float(_parabolic_offset(evaluate(best[0] - 1, best[1]), c0,
+                                              evaluate(best[0] + 1, best[1])))
+                dx += float(_parabolic_offset(evaluate(best[0], best[1] - 1), c0,
+                                              evaluate(best[0], best[1] + 1)))
+            dy_out[by, bx] = dy
+            dx_out[by, bx] = dx
+
+    return dx_out, dy_out, evaluations, rows_done
+
+
+def ssd_block_matching_custom(frame1: np.ndarray, frame2: np.ndarray, block_size: int = 16, search_range: int = 4,
+                              cost: str = "ssd", subpixel: bool = False, search: str = "exhaustive",
+                              stop_cost: float = 0.0, info: Dict[str, Any] = None,
+                              context: FramePairContext = None, deadline: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Custom block matching implementation.
+
+    ``cost`` selects the matching criterion ("ssd", "sad" or "ncc"). With
+    ``subpixel=True`` the integer displacement is refined by fitting a
+    parabola through the neighbouring costs along each axis.
+
+    ``search="exhaustive"`` evaluates every displacement for all blocks at
+    once (ties resolve to the zero vector). "three_step", "diamond" and
+    "hexagon" run a predictive search per block that evaluates a few dozen
+    candidates instead of (2r+1)^2, stopping early below ``stop_cost``.
+    The number of candidates evaluated is written to ``info``. The
+    predictive searches stop at ``deadline``, leaving the blocks not yet
+    searched at zero motion.
+    """
+    if cost not in BLOCK_MATCHING_COSTS:
+        raise ValueError(f"Unknown block matching cost: {cost}")
+    if search not in BLOCK_SEARCH_STRATEGIES:
+        raise ValueError(f"Unknown block search strategy: {search}")
+
+    # Work in float so uint8 differences do not wrap around
+    if context is None:
+        context = FramePairContext(frame1, frame2)
+    f1, f2 = context.float_frames()
+
+    h, w = f1.shape
     u = np.zeros((h//block_size, w//block_size), dtype=np.float32)
     v = np.zeros((h//block_size, w//block_size), dtype=np.float32)
 
-    for y in range(0, h - block_size, block_size):
-        for x in range(0, w - block_size, block_size):
-            best_score = float('inf')
-            best_dx, best_dy = 0, 0
-            block = frame1[y:y+block_size, x:x+block_size]
-
-            for dy in range(-search_range, search_range+1):
-                for dx in range(-search_range, search_range+1):
-                    ny, nx = y + dy, x + dx
-                    if 0 <= ny < h - block_size and 0 <= nx < w - block_size:
-                        candidate = frame2[ny:ny+block_size, nx:nx+block_size]
-                        score = np.sum((block - candidate) ** 2)
-                        if score < best_score:
-                            best_score = score
-                            best_dx, best_dy = dx, dy
-            u[y//block_size, x//block_size] = best_dx
-            v[y//block_size, x//block_size] = best_dy
+    ys, xs = _block_grid((h, w), block_size)
+    evaluations = 0
+    if len(ys) and len(xs) and search != "exhaustive":
+        dx, dy, evaluations, rows_done = _predictive_block_search(
+            f1, f2, block_size, search_range, cost, search, stop_cost, subpixel, deadline)
+        if rows_done < len(ys) and info is not None:
+            info["truncated"] = True
+            info["truncated_at_block_row"] = rows_done
+        u[:len(ys), :len(xs)] = dx
+        v[:len(ys), :len(xs)] = dy
+    elif len(ys) and len(xs):
+        r = search_range
+        d = 2 * r + 1
+        costs = _block_cost_volume(f1, f2, block_size, r, cost)
+        evaluations = int(np.count_nonzero(np.isfinite(costs)))
+        flat = costs.reshape(d * d, len(ys), len(xs))
+
+        best = np.argmin(flat, axis=0)
+        best_cost = np.take_along_axis(flat, best[None], axis=0)[0]
+        zero = r * d + r
+        best = np.where(flat[zero] <= best_cost, zero, best)
+
+        iy, ix = best // d, best % d
+        dy = (iy - r).astype(np.float32)
+        dx = (ix - r).astype(np.float32)
+
+        if subpixel:
+            by, bx = np.indices(best.shape)
+            c0 = costs[iy, ix, by, bx]
+            up = np.where(iy > 0, costs[np.maximum(iy - 1, 0), ix, by, bx], np.inf)
+            down = np.where(iy < d - 1, costs[np.minimum(iy + 1, d - 1), ix, by, bx], np.inf)
+            left = np.where(ix > 0, costs[iy, np.maximum(ix - 1, 0), by, bx], np.inf)
+            right = np.where(ix < d - 1, costs[iy, np.minimum(ix + 1, d - 1), by, bx], np.inf)
+            dy += _parabolic_offset(up, c0, down)
+            dx += _parabolic_offset(left, c0, right)
+
+        u[:len(ys), :len(xs)] = dx
+        v[:len(ys), :len(xs)] = dy
+
+    if info is not None:
+        info["candidates_evaluated"] = evaluations
+        info["candidates_per_block"] = round(evaluations / max(1, len(ys) * len(xs)), 2)
 
     # Upscale to original image size
     u = cv2.resize(u, (w, h), interpolation=cv2.INTER_NEAREST)
     v = cv2.resize(v, (w, h), interpolation=cv2.INTER_NEAREST)
     return u, v
 
+
+def diamond_block_matching_custom(frame1: np.ndarray, frame2: np.ndarray, block_size: int = 16,
+                                  search_range: int = 16, info: Dict[str, Any] = None,
+                                  context: FramePairContext = None,
+                                  deadline: float = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Predictive diamond-search block matching with SAD cost; stops at ``deadline``."""
+    return ssd_block_matching_custom(frame1, frame2, block_size=block_size, search_range=search_range,
+                                     cost="sad", search="diamond", stop_cost=1.0, info=info, context=context,
+                                     deadline=deadline)
+
 # Library implementations
 
 
-def lucas_kanade_scikit(im1: np.ndarray, im2: np.ndarray, radius: int = 7, num_warp: int = 10) -> Tuple[np.ndarray, np.ndarray]:
-    """Scikit-image Lucas-Kanade implementation (fallback to custom if not available)."""
+def _ilk_with_deadline(gray1: np.ndarray, gray2: np.ndarray, radius: int, num_warp: int, deadline: float,
+                       info: Dict[str, Any] = None) -> np.ndarray:
+    """optical_flow_ilk run one warp at a time so it can stop at ``deadline``.
+
+    A single warp of the iLK solver only depends on the current flow, so
+    chaining one-warp calls gives the same result as one call with
+    ``num_warp`` warps. Once the deadline passes, the remaining pyramid
+    levels just pass the upsampled flow through. If scikit-image no longer
+    has the private helpers this needs, plain ``optical_flow_ilk`` runs
+    instead and ignores the deadline.
+    """
+    if not SKIMAGE_ILK_INTERNALS_AVAILABLE:
+        return optical_flow_ilk(gray1, gray2, radius=radius, num_warp=num_warp)
+
+    state = {"level": 0, "truncated_at": None}
+
+    def solver(reference, moving, flow):
+        level = state["level"]
+        state["level"] += 1
+        for warp in range(num_warp):
+            if deadline_passed(deadline):
+                if state["truncated_at"] is None:
+                    state["truncated_at"] = (level, warp)
+                break
+            flow = _ilk(reference, moving, flow, radius=radius, num_warp=1, gaussian=False, prefilter=False)
+        return flow
+
+    flow = _coarse_to_fine(gray1, gray2, solver, dtype=np.float32)
+    if info is not None and state["truncated_at"] is not None:
+        level, warp = state["truncated_at"]
+        info["truncated"] = True
+        # Pyramid levels are counted from the full-resolution image
+        info["truncated_at_level"] = state["level"] - 1 - level
+        info["truncated_at_warp"] = warp
+    return flow
+
+
+def lucas_kanade_scikit(im1: np.ndarray, im2: np.ndarray, radius: int = 7, num_warp: int = 10,
+                        context: FramePairContext = None, deadline: float = None,
+                        info: Dict[str, Any] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Scikit-image Lucas-Kanade implementation (fallback to custom if not available).
+
+    With a ``deadline`` the warps are run one at a time and the flow so
+    far is returned once it passes.
+    """
     if not SKIMAGE_FLOW_AVAILABLE:
         print("Scikit-image optical flow not available, using custom implementation")
-        return lucas_kanade_dense_custom(im1, im2, window_size=radius*2+1)
+        return lucas_kanade_dense_custom(im1, im2, window_size=radius*2+1, context=context)
 
     gray1 = rgb2gray(im1) if im1.ndim == 3 else im1
     gray2 = rgb2gray(im2) if im2.ndim == 3 else im2
 
     # optical_flow_ilk returns flow with shape (2, height, width)
-    flow = optical_flow_ilk(gray1, gray2, radius=radius, num_warp=num_warp)
+    if deadline is None:
+        flow = optical_flow_ilk(gray1, gray2, radius=radius, num_warp=num_warp)
+    else:
+        flow = _ilk_with_deadline(gray1, gray2, radius, num_warp, deadline, info)
     # First component is v (vertical), second is u (horizontal)
     v, u = flow[0], flow[1]
 
@@ -187,21 +735,242 @@ def farneback_opencv(im1: np.ndarray, im2: np.ndarray, pyr_scale: float = 0.5, l
     return u, v
 
 
+def _to_uint8_pair(im1: np.ndarray, im2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Contiguous grayscale uint8 versions of a frame pair, scaling float input with a shared range.
+
+    DIS and TV-L1 reject non-contiguous views such as tiles, so uint8
+    input is copied when it is not contiguous.
+    """
+    gray1 = cv2.cvtColor(im1, cv2.COLOR_BGR2GRAY) if im1.ndim == 3 else im1
+    gray2 = cv2.cvtColor(im2, cv2.COLOR_BGR2GRAY) if im2.ndim == 3 else im2
+    if gray1.dtype == np.uint8 and gray2.dtype == np.uint8:
+        return np.ascontiguousarray(gray1), np.ascontiguousarray(gray2)
+    lo = min(float(gray1.min()), float(gray2.min()))
+    hi = max(float(gray1.max()), float(gray2.max()))
+    scale = 255.0 / (hi - lo) if hi > lo else 0.0
+    return (np.clip((gray1 - lo) * scale, 0, 255).astype(np.uint8),
+            np.clip((gray2 - lo) * scale, 0, 255).astype(np.uint8))
+
+
+def _inverse_distance_weighting(points: np.ndarray, vectors: np.ndarray, query: np.ndarray,
+                                power: float) -> np.ndarray:
+    """Inverse-distance weighted average of ``vectors`` at each ``query`` position."""
+    dense = np.zeros((len(query), 2), dtype=np.float32)
+    # Chunk the query grid so the distance matrix stays small
+    for start in range(0, len(query), 4096):
+        q = query[start:start + 4096]
+        d2 = (q[:, None, 0] - points[None, :, 0]) ** 2 + (q[:, None, 1] - points[None, :, 1]) ** 2
+        d2 = np.maximum(d2, 1e-6)
+        weights = 1.0 / d2 if power == 2 else d2 ** (-power / 2)
+        dense[start:start + 4096] = weights @ vectors / weights.sum(axis=1, keepdims=True)
+    return dense
+
+
+def densify_sparse_flow(points: np.ndarray, vectors: np.ndarray, shape: Tuple[int, int],
+                        interpolation: str = "delaunay", grid_step: int = 4,
+                        power: float = 2.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interpolate sparse flow vectors to a dense (u, v) field.
+
+    Args:
+        points: (N, 2) array of (x, y) positions in the first frame
+        vectors: (N, 2) array of (dx, dy) displacements
+        shape: (height, width) of the output field
+        interpolation: "delaunay" (barycentric inside the triangulation,
+            nearest neighbour outside; inverse-distance weighting when the
+            points cannot be triangulated) or "idw" (inverse-distance weighting)
+        grid_step: Interpolate on a grid this much coarser, then upsample
+        power: Distance exponent for inverse-distance weighting
+
+    Returns:
+        Dense flow components u, v
+    """
+    h, w = shape
+    if len(points) == 0:
+        return np.zeros(shape, dtype=np.float32), np.zeros(shape, dtype=np.float32)
+
+    gh, gw = (h + grid_step - 1) // grid_step, (w + grid_step - 1) // grid_step
+    # cv2.resize treats each coarse sample as the centre of its grid_step cell, so sample there
+    gy, gx = np.mgrid[0:gh, 0:gw].astype(np.float32) * grid_step + (grid_step - 1) / 2
+    query = np.column_stack((gx.ravel(), gy.ravel()))
+
+    if interpolation not in ("delaunay", "idw"):
+        raise ValueError(f"Unknown interpolation: {interpolation}")
+
+    dense = None
+    if interpolation == "delaunay" and len(points) >= 3:
+        try:
+            dense = LinearNDInterpolator(points, vectors)(query)
+        except QhullError:
+            # Collinear or coincident points have no triangulation
+            dense = None
+        else:
+            outside = np.isnan(dense[:, 0])
+            if np.any(outside):
+                dense[outside] = NearestNDInterpolator(points, vectors)(query[outside])
+    if dense is None:
+        dense = _inverse_distance_weighting(points, vectors, query, power)
+
+    u = dense[:, 0].reshape(gh, gw).astype(np.float32)
+    v = dense[:, 1].reshape(gh, gw).astype(np.float32)
+    u = cv2.resize(u, (gw * grid_step, gh * grid_step), interpolation=cv2.INTER_LINEAR)[:h, :w]
+    v = cv2.resize(v, (gw * grid_step, gh * grid_step), interpolation=cv2.INTER_LINEAR)[:h, :w]
+    return np.ascontiguousarray(u), np.ascontiguousarray(v)
+
+
+DIS_PRESETS = {
+    "ultrafast": cv2.DISOPTICAL_FLOW_PRESET_ULTRAFAST,
+    "fast": cv2.DISOPTICAL_FLOW_PRESET_FAST,
+    "medium": cv2.DISOPTICAL_FLOW_PRESET_MEDIUM
+}
+
+# OpenCV algorithm objects are reused across calls; they are not thread-safe, so one set per thread
+_algorithms = threading.local()
+
+
+def _cached_algorithm(key: str, factory):
+    """Return this thread's instance of an OpenCV flow algorithm, creating it on first use."""
+    objects = getattr(_algorithms, "objects", None)
+    if objects is None:
+        objects = _algorithms.objects = {}
+    if key not in objects:
+        objects[key] = factory()
+    return objects[key]
+
+
+def dis_opencv(im1: np.ndarray, im2: np.ndarray, preset: str = "fast") -> Tuple[np.ndarray, np.ndarray]:
+    """OpenCV DIS (Dense Inverse Search) optical flow with an ULTRAFAST/FAST/MEDIUM preset."""
+    if preset not in DIS_PRESETS:
+        raise ValueError(f"Unknown DIS preset: {preset}")
+    gray1, gray2 = _to_uint8_pair(im1, im2)
+    dis = _cached_algorithm(f"dis_{preset}", lambda: cv2.DISOpticalFlow_create(DIS_PRESETS[preset]))
+    flow = dis.calc(gray1, gray2, None)
+    return flow[..., 0], flow[..., 1]
+
+
+def dis_ultrafast_opencv(im1: np.ndarray, im2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """OpenCV DIS optical flow, ULTRAFAST preset."""
+    return dis_opencv(im1, im2, preset="ultrafast")
+
+
+def dis_medium_opencv(im1: np.ndarray, im2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """OpenCV DIS optical flow, MEDIUM preset."""
+    return dis_opencv(im1, im2, preset="medium")
+
+
+def tvl1_scikit(im1: np.ndarray, im2: np.ndarray, attachment: float = 15, tightness: float = 0.3,
+                num_warp: int = 5, num_iter: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+    """Scikit-image TV-L1 implementation (fallback to custom Horn-Schunck if not available)."""
+    if not SKIMAGE_FLOW_AVAILABLE:
+        print("Scikit-image optical flow not available, using custom implementation")
+        return horn_schunck_custom(im1, im2)
+
+    gray1 = rgb2gray(im1) if im1.ndim == 3 else im1
+    gray2 = rgb2gray(im2) if im2.ndim == 3 else im2
+
+    # optical_flow_tvl1 returns flow with shape (2, height, width), v first
+    flow = optical_flow_tvl1(gray1, gray2, attachment=attachment, tightness=tightness,
+                             num_warp=num_warp, num_iter=num_iter)
+    v, u = flow[0], flow[1]
+    return u, v
+
+
+def tvl1_opencv(im1: np.ndarray, im2: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """OpenCV contrib Dual TV-L1 optical flow (requires opencv-contrib-python)."""
+    gray1, gray2 = _to_uint8_pair(im1, im2)
+    tvl1 = _cached_algorithm("tvl1", cv2.optflow.DualTVL1OpticalFlow_create)
+    flow = tvl1.calc(gray1, gray2, None)
+    return flow[..., 0], flow[..., 1]
+
+
+def sparse_lk_opencv(im1: np.ndarray, im2: np.ndarray, max_corners: int = 300, detector: str = "shi-tomasi",
+                     interpolation: str = "delaunay", fb_threshold: float = 1.0,
+                     info: Dict[str, Any] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sparse feature tracking densified to a full flow field.
+
+    Shi-Tomasi or FAST corners are tracked with pyramidal Lucas-Kanade
+    (cv2.calcOpticalFlowPyrLK). Tracks that fail the forward-backward check
+    (round trip further than ``fb_threshold`` pixels) are dropped and the
+    rest are interpolated with ``densify_sparse_flow``. The number of
+    detected and tracked points is written to ``info``.
+    """
+    gray1, gray2 = _to_uint8_pair(im1, im2)
+
+    if detector == "shi-tomasi":
+        corners = cv2.goodFeaturesToTrack(gray1, maxCorners=max_corners, qualityLevel=0.01, minDistance=7)
+        points = corners.reshape(-1, 2) if corners is not None else np.empty((0, 2), np.float32)
+    elif detector == "fast":
+        keypoints = cv2.FastFeatureDetector_create().detect(gray1)
+        keypoints = sorted(keypoints, key=lambda k: k.response, reverse=True)[:max_corners]
+        points = np.array([k.pt for k in keypoints], dtype=np.float32).reshape(-1, 2)
+    else:
+        raise ValueError(f"Unknown feature detector: {detector}")
+
+    good = np.zeros(len(points), dtype=bool)
+    tracked = points
+    if len(points):
+        lk_params = dict(winSize=(21, 21), maxLevel=3,
+                         criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 30, 0.01))
+        p0 = points.reshape(-1, 1, 2)
+        p1, status, _ = cv2.calcOpticalFlowPyrLK(gray1, gray2, p0, None, **lk_params)
+        p0r, status_back, _ = cv2.calcOpticalFlowPyrLK(gray2, gray1, p1, None, **lk_params)
+        fb_error = np.linalg.norm((p0 - p0r).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (status_back.ravel() == 1) & (fb_error < fb_threshold)
+        tracked = p1.reshape(-1, 2)
+
+    if info is not None:
+        info["points_detected"] = int(len(points))
+        info["points_tracked"] = int(good.sum())
+        info["track_success_rate"] = round(float(good.mean()), 4) if len(points) else 0.0
+
+    return densify_sparse_flow(points[good], tracked[good] - points[good], gray1.shape,
+                               interpolation=interpolation)
+
+
 # Method collections
 CUSTOM_METHODS = {
     "Horn-Schunck (Custom)": horn_schunck_custom,
+    "Horn-Schunck Multigrid (Custom)": horn_schunck_multigrid_custom,
     "Lucas-Kanade Dense (Custom)": lucas_kanade_dense_custom,
     "Pyramidal Lucas-Kanade (Custom)": pyr_lucas_kanade_custom,
-    "SSD Block Matching (Custom)": ssd_block_matching_custom
+    "SSD Block Matching (Custom)": ssd_block_matching_custom,
+    "Diamond Search Block Matching (Custom)": diamond_block_matching_custom
 }
 
 LIBRARY_METHODS = {
     "Lucas-Kanade (Scikit)": lucas_kanade_scikit,
-    "Farneback (OpenCV)": farneback_opencv
+    "Farneback (OpenCV)": farneback_opencv,
+    "Sparse LK + Interpolation (OpenCV)": sparse_lk_opencv,
+    "DIS Ultrafast (OpenCV)": dis_ultrafast_opencv,
+    "DIS Fast (OpenCV)": dis_opencv,
+    "DIS Medium (OpenCV)": dis_medium_opencv,
+    "TV-L1 (Scikit)": tvl1_scikit
 }
 
+if OPENCV_TVL1_AVAILABLE:
+    LIBRARY_METHODS["TV-L1 (OpenCV)"] = tvl1_opencv
+
 ALL_METHODS = {**CUSTOM_METHODS, **LIBRARY_METHODS}
 
+# Halo (in pixels) each method needs around a tile to be run tile by tile;
+# methods missing here always run on the whole frame
+METHOD_HALOS = {
+    "Horn-Schunck (Custom)": 32,
+    "Horn-Schunck Multigrid (Custom)": 64,
+    "Lucas-Kanade Dense (Custom)": 8,
+    "Pyramidal Lucas-Kanade (Custom)": 32,
+    "SSD Block Matching (Custom)": 32,  # multiple of the block size keeps the block grid aligned
+    "Diamond Search Block Matching (Custom)": 32,
+    "Lucas-Kanade (Scikit)": 16,
+    "Farneback (OpenCV)": 96,
+    "DIS Ultrafast (OpenCV)": 32,
+    "DIS Fast (OpenCV)": 32,
+    "DIS Medium (OpenCV)": 48,
+    "TV-L1 (Scikit)": 48,
+    "TV-L1 (OpenCV)": 48
+}
+
 
 def get_method_category(method_name: str) -> str:
     """Get the category of a method (Custom or Library)."""
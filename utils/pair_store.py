@@ -0,0 +1,96 @@
+import os
+import time
+import uuid
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+# Seconds an unused pair is kept, and the memory budget of all stored pairs
+DEFAULT_PAIR_TTL = float(os.environ.get("FLOW_PAIR_TTL", "600"))
+DEFAULT_PAIR_MB = int(os.environ.get("FLOW_PAIR_MB", "512"))
+
+
+class PairStore:
+    """
+    Decoded frame pairs kept server-side between requests.
+
+    Each pair holds the grayscale frames and, optionally, the colour ones.
+    A pair expires ``ttl`` seconds after it was last used, and least
+    recently used pairs are dropped once the stored arrays exceed
+    ``max_bytes``.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._pairs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.evictions = 0
+
+    def _drop(self, pair_id: str) -> None:
+        self.bytes -= self._pairs.pop(pair_id)["nbytes"]
+
+    def _expire(self, now: float) -> None:
+        while self._pairs:
+            pair_id, pair = next(iter(self._pairs.items()))
+            if now - pair["last_used"] <= self.ttl:
+                break
+            self._drop(pair_id)
+
+    def put(self, gray1: np.ndarray, gray2: np.ndarray,
+            color1: np.ndarray = None, color2: np.ndarray = None) -> Optional[str]:
+        """Store a pair and return its id, or None if it alone exceeds the budget."""
+        frames = {"gray": (gray1, gray2)}
+        if color1 is not None and color2 is not None:
+            frames["color"] = (color1, color2)
+        nbytes = sum(f.nbytes for pair in frames.values() for f in pair)
+        if nbytes > self.max_bytes:
+            return None
+
+        pair_id = uuid.uuid4().hex
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            self._pairs[pair_id] = dict(frames, nbytes=nbytes, last_used=now)
+            self.bytes += nbytes
+            while self.bytes > self.max_bytes:
+                self._drop(next(iter(self._pairs)))
+                self.evictions += 1
+        return pair_id
+
+    def get(self, pair_id: str) -> Optional[Dict[str, Any]]:
+        """The stored frames for ``pair_id`` ("gray" and maybe "color"), or None if unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            pair = self._pairs.get(pair_id)
+            if pair is None:
+                return None
+            pair["last_used"] = now
+            self._pairs.move_to_end(pair_id)
+            return pair
+
+    def delete(self, pair_id: str) -> bool:
+        """Drop a pair; returns whether it existed."""
+        with self._lock:
+            if pair_id not in self._pairs:
+                return False
+            self._drop(pair_id)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Number of pairs, bytes held and evictions."""
+        with self._lock:
+            self._expire(time.monotonic())
+            return {
+                "pairs": len(self._pairs),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "evictions": self.evictions
+            }
+
+
+pair_store = PairStore(DEFAULT_PAIR_TTL, DEFAULT_PAIR_MB * 1024 * 1024)
@@ -0,0 +1,109 @@
+import os
+import io
+import json
+import marshal
+import cProfile
+import pstats
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Requests may only ask for profiling when this is set: profiling slows them down noticeably
+PROFILING_ENABLED = os.environ.get("FLOW_PROFILING", "0").lower() in ("1", "true", "yes")
+
+# Functions listed in a profile summary
+DEFAULT_PROFILE_TOP = int(os.environ.get("FLOW_PROFILE_TOP", "30"))
+
+_local = threading.local()
+
+
+def profile_call(func: Callable, *args, **kwargs) -> Tuple[Any, Optional[dict]]:
+    """
+    Call ``func`` under cProfile in the current thread.
+
+    Returns the result and the raw profile data (picklable, so it can come
+    back from a worker process), or None for the data when another
+    profiler is already active in this thread.
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return func(*args, **kwargs), None
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        profiler.disable()
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+class _RawStats:
+    """Adapter letting ``pstats.Stats`` load raw profile data."""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class RequestProfile:
+    """
+    cProfile data of one request, merged across every thread and process it used.
+
+    ``run`` profiles the request's own thread; work handed to other
+    threads or processes (e.g. methods run by ``compare_methods``) is
+    profiled there with ``profile_call`` and merged back with ``add``.
+    """
+
+    def __init__(self):
+        self._stats: Optional[pstats.Stats] = None
+        self._lock = threading.Lock()
+
+    def add(self, stats: Optional[dict]) -> None:
+        """Merge raw profile data from another thread or process."""
+        if not stats:
+            return
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(_RawStats(stats), stream=io.StringIO())
+            else:
+                self._stats.add(_RawStats(stats))
+
+    def run(self, func: Callable[[], Any]) -> Any:
+        """Run ``func`` profiled in this thread; ``active_profile()`` returns this profile meanwhile."""
+        _local.profile = self
+        try:
+            result, stats = profile_call(func)
+        finally:
+            _local.profile = None
+        self.add(stats)
+        return result
+
+    def summary(self, top: int = DEFAULT_PROFILE_TOP) -> List[Dict[str, Any]]:
+        """The ``top`` functions by cumulative time."""
+        with self._lock:
+            if self._stats is None:
+                return []
+            entries = sorted(self._stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:top]
+        return [{
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_time": round(total_time, 6),
+            "cumulative_time": round(cumulative_time, 6)
+        } for func, (primitive_calls, calls, total_time, cumulative_time, _) in entries]
+
+    def summary_json(self, top: int = DEFAULT_PROFILE_TOP) -> bytes:
+        """``summary`` encoded as JSON."""
+        return json.dumps({"functions": self.summary(top)}).encode()
+
+    def dump(self) -> bytes:
+        """The merged profile in the ``.prof`` format read by ``pstats.Stats`` and snakeviz."""
+        with self._lock:
+            return marshal.dumps(self._stats.stats if self._stats is not None else {})
+
+
+def active_profile() -> Optional[RequestProfile]:
+    """The profile of the request running in this thread, if it is being profiled."""
+    return getattr(_local, "profile", None)
@@ -0,0 +1,75 @@
+import functools
+import numpy as np
+import cv2
+from typing import Any, Dict, Tuple
+
+# Per-tier processing scale and method parameter overrides. "full" keeps the
+# defaults from motion_methods; methods missing from a tier keep theirs too.
+QUALITY_TIERS: Dict[str, Dict[str, Any]] = {
+    "preview": {
+        "scale": 0.5,
+        "params": {
+            "Horn-Schunck (Custom)": {"num_iter": 20, "tol": 1e-2},
+            "Horn-Schunck Multigrid (Custom)": {"num_iter": 10, "tol": 1e-2},
+            "Pyramidal Lucas-Kanade (Custom)": {"num_levels": 2},
+            "SSD Block Matching (Custom)": {"block_size": 8, "search_range": 4},
+            "Diamond Search Block Matching (Custom)": {"block_size": 8, "search_range": 8},
+            "Lucas-Kanade (Scikit)": {"radius": 5, "num_warp": 2},
+            "Farneback (OpenCV)": {"levels": 2, "iterations": 2},
+            "Sparse LK + Interpolation (OpenCV)": {"max_corners": 150},
+            "TV-L1 (Scikit)": {"num_warp": 2, "num_iter": 5}
+        }
+    },
+    "balanced": {
+        "scale": 1.0,
+        "params": {
+            "Horn-Schunck (Custom)": {"tol": 1e-3},
+            "Horn-Schunck Multigrid (Custom)": {"num_iter": 30},
+            "Lucas-Kanade (Scikit)": {"num_warp": 5},
+            "TV-L1 (Scikit)": {"num_warp": 3}
+        }
+    },
+    "full": {
+        "scale": 1.0,
+        "params": {}
+    }
+}
+
+DEFAULT_QUALITY = "full"
+
+
+def get_quality_scale(quality: str) -> float:
+    """Processing scale for a quality tier."""
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality: {quality}")
+    return QUALITY_TIERS[quality]["scale"]
+
+
+def apply_quality(methods: Dict[str, callable], quality: str) -> Dict[str, callable]:
+    """Bind the parameter overrides of a quality tier to each method."""
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"Unknown quality: {quality}")
+    params = QUALITY_TIERS[quality]["params"]
+    return {name: functools.partial(func, **params[name]) if params.get(name) else func
+            for name, func in methods.items()}
+
+
+def downscale_frame(frame: np.ndarray, scale: float) -> np.ndarray:
+    """Resize a frame by ``scale`` with area averaging (no-op for scale 1)."""
+    if scale == 1.0:
+        return frame
+    h, w = frame.shape[:2]
+    size = (max(1, int(round(w * scale))), max(1, int(round(h * scale))))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def resize_flow(u: np.ndarray, v: np.ndarray, shape: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Resample a flow field to ``shape`` (height, width), rescaling the vectors to match."""
+    h, w = shape
+    if u.shape[:2] == (h, w):
+        return u, v
+    fx = w / u.shape[1]
+    fy = h / u.shape[0]
+    u = cv2.resize(np.asarray(u, dtype=np.float32), (w, h), interpolation=cv2.INTER_LINEAR) * fx
+    v = cv2.resize(np.asarray(v, dtype=np.float32), (w, h), interpolation=cv2.INTER_LINEAR) * fy
+    return u, v
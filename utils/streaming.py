@@ -0,0 +1,118 @@
+import os
+import time
+import numpy as np
+import cv2
+from collections import deque
+from typing import Any, Dict, Iterator, Optional
+from utils.frame_context import FramePairContext
+from utils.evaluation_metrics import accepts_keyword
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".tif", ".tiff", ".pgm", ".ppm")
+
+# Number of recent per-pair latencies kept for the latency statistics
+LATENCY_WINDOW = 1000
+
+
+def iter_frames(source: str) -> Iterator[np.ndarray]:
+    """Grayscale frames from an image directory (sorted by name), a video file or a camera index."""
+    if os.path.isdir(source):
+        names = sorted(n for n in os.listdir(source) if n.lower().endswith(IMAGE_EXTENSIONS))
+        for name in names:
+            frame = cv2.imread(os.path.join(source, name), cv2.IMREAD_GRAYSCALE)
+            if frame is not None:
+                yield frame
+        return
+
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    finally:
+        capture.release()
+
+
+class FlowStream:
+    """
+    Optical flow over consecutive frames of a sequence.
+
+    Each pushed frame is paired with the previous one. The frame pair
+    context is advanced rather than rebuilt, so the float conversion,
+    pyramid and per-frame gradients of frame N are reused as the first
+    frame of pair N+1. Methods taking ``initial_flow`` are warm-started
+    from the previous pair's flow.
+    """
+
+    def __init__(self, method_func, warm_start: bool = True):
+        self.method_func = method_func
+        self.warm_start = warm_start and accepts_keyword(method_func, "initial_flow")
+        self._accepts_context = accepts_keyword(method_func, "context")
+        self._accepts_info = accepts_keyword(method_func, "info")
+        self._context: Optional[FramePairContext] = None
+        self._previous: Optional[np.ndarray] = None
+        self._flow = None
+        self._started: Optional[float] = None
+        self.frames = 0
+        self.pairs = 0
+        self.compute_time = 0.0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def push(self, frame: np.ndarray) -> Optional[Dict[str, Any]]:
+        """Add the next frame; returns the flow against the previous frame (None for the first)."""
+        started = time.perf_counter()
+        if self._started is None:
+            self._started = started
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        self.frames += 1
+
+        if self._previous is None or self._previous.shape != gray.shape:
+            # First frame, or the resolution changed: start a new sequence
+            self._previous, self._context, self._flow = gray, None, None
+            return None
+
+        if self._context is not None:
+            context = self._context.advance(gray)
+        else:
+            context = FramePairContext(self._previous, gray)
+
+        info = {}
+        kwargs = {}
+        if self._accepts_context:
+            kwargs["context"] = context
+        if self._accepts_info:
+            kwargs["info"] = info
+        if self.warm_start and self._flow is not None:
+            kwargs["initial_flow"] = self._flow
+
+        u, v = self.method_func(self._previous, gray, **kwargs)
+        latency = time.perf_counter() - started
+
+        self._previous, self._context, self._flow = gray, context, (u, v)
+        self.pairs += 1
+        self.compute_time += latency
+        self.latencies.append(latency)
+        return {
+            "frame": self.frames - 1,
+            "flow": (u, v),
+            "latency": latency,
+            "method_info": info,
+            "cache_stats": context.stats() if self._accepts_context else None
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Throughput and per-pair latency so far."""
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        elapsed = time.perf_counter() - self._started if self._started is not None else 0.0
+        return {
+            "frames": self.frames,
+            "pairs": self.pairs,
+            "fps": round(self.pairs / self.compute_time, 2) if self.compute_time else 0.0,
+            "wall_fps": round(self.pairs / elapsed, 2) if elapsed else 0.0,
+            "mean_latency": round(float(latencies.mean()), 4),
+            "p95_latency": round(float(np.percentile(latencies, 95)), 4),
+            "max_latency": round(float(latencies.max()), 4)
+        }
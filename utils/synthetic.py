@@ -0,0 +1,207 @@
+import numpy as np
+import cv2
+from typing import Any, Callable, Dict, List, Tuple
+from utils.evaluation_metrics import compare_methods, calculate_endpoint_error, calculate_angular_error
+
+# Fixed-point iterations used to invert a flow field for warping
+INVERSE_ITERATIONS = 20
+
+
+def translation_flow(shape: Tuple[int, int], dx: float = 3.0, dy: float = -2.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Uniform shift by (dx, dy) pixels."""
+    return np.full(shape, dx, np.float32), np.full(shape, dy, np.float32)
+
+
+def rotation_flow(shape: Tuple[int, int], degrees: float = 3.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Rotation by ``degrees`` about the frame centre."""
+    y, x = np.indices(shape, dtype=np.float32)
+    cx, cy = (shape[1] - 1) / 2, (shape[0] - 1) / 2
+    angle = np.deg2rad(degrees)
+    xr = cx + (x - cx) * np.cos(angle) - (y - cy) * np.sin(angle)
+    yr = cy + (x - cx) * np.sin(angle) + (y - cy) * np.cos(angle)
+    return (xr - x).astype(np.float32), (yr - y).astype(np.float32)
+
+
+def zoom_flow(shape: Tuple[int, int], factor: float = 1.05) -> Tuple[np.ndarray, np.ndarray]:
+    """Zoom by ``factor`` about the frame centre."""
+    y, x = np.indices(shape, dtype=np.float32)
+    cx, cy = (shape[1] - 1) / 2, (shape[0] - 1) / 2
+    return ((x - cx) * (factor - 1)).astype(np.float32), ((y - cy) * (factor - 1)).astype(np.float32)
+
+
+def piecewise_affine_flow(shape: Tuple[int, int], cells: int = 4, magnitude: float = 3.0,
+                          seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    A different random affine motion in each cell of a ``cells`` x ``cells`` grid.
+
+    Cell boundaries are slightly smoothed so the field stays invertible;
+    ``magnitude`` bounds the displacement in pixels.
+    """
+    rng = np.random.default_rng(seed)
+    h, w = shape
+    y, x = np.indices(shape, dtype=np.float32)
+    row = np.minimum(y * cells // h, cells - 1).astype(int)
+    col = np.minimum(x * cells // w, cells - 1).astype(int)
+    # Per cell: translation and a small linear part, relative to the cell centre
+    shift = rng.uniform(-magnitude, magnitude, (cells, cells, 2)).astype(np.float32)
+    linear = rng.uniform(-0.02, 0.02, (cells, cells, 2, 2)).astype(np.float32)
+    dx = x - ((col + 0.5) * w / cells)
+    dy = y - ((row + 0.5) * h / cells)
+    u = shift[row, col, 0] + linear[row, col, 0, 0] * dx + linear[row, col, 0, 1] * dy
+    v = shift[row, col, 1] + linear[row, col, 1, 0] * dx + linear[row, col, 1, 1] * dy
+    sigma = max(h, w) / (cells * 8)
+    return (cv2.GaussianBlur(u.astype(np.float32), (0, 0), sigma),
+            cv2.GaussianBlur(v.astype(np.float32), (0, 0), sigma))
+
+
+def large_displacement_flow(shape: Tuple[int, int], dx: float = 24.0, dy: float = 12.0) -> Tuple[np.ndarray, np.ndarray]:
+    """Uniform shift far beyond a single-scale window."""
+    return translation_flow(shape, dx, dy)
+
+
+SYNTHETIC_MOTIONS: Dict[str, Callable[[Tuple[int, int]], Tuple[np.ndarray, np.ndarray]]] = {
+    "translation": translation_flow,
+    "rotation": rotation_flow,
+    "zoom": zoom_flow,
+    "piecewise_affine": piecewise_affine_flow,
+    "large_displacement": large_displacement_flow,
+}
+
+
+def warp_frame(frame: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    The second frame of a pair whose true flow from ``frame`` is (u, v).
+
+    A pixel at x in ``frame`` moves to x + flow(x), so the second frame is
+    sampled at the inverse mapping, found by fixed-point iteration
+    (exact for translations, converging for any smooth field whose
+    gradient stays well below one).
+    """
+    h, w = frame.shape[:2]
+    y, x = np.indices((h, w), dtype=np.float32)
+    map_x, map_y = x - u, y - v
+    for _ in range(INVERSE_ITERATIONS):
+        map_x, map_y = (x - cv2.remap(u, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE),
+                        y - cv2.remap(v, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE))
+    return cv2.remap(frame, map_x, map_y, cv2.INTER_LINEAR, borderMode=cv2.BORDER_REFLECT)
+
+
+def valid_mask(u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Pixels whose destination stays inside the frame; the rest have no true correspondence."""
+    h, w = u.shape
+    y, x = np.indices((h, w), dtype=np.float32)
+    return (x + u >= 0) & (x + u <= w - 1) & (y + v >= 0) & (y + v <= h - 1)
+
+
+def make_case(frame: np.ndarray, motion: str) -> Dict[str, Any]:
+    """A synthetic pair from one frame: the frame, its warped copy, the true flow and the valid mask."""
+    u, v = SYNTHETIC_MOTIONS[motion](frame.shape[:2])
+    return {"frame1": frame, "frame2": warp_frame(frame, u, v), "flow": (u, v), "mask": valid_mask(u, v)}
+
+
+def score_flow(flow: Tuple[np.ndarray, np.ndarray], true_flow: Tuple[np.ndarray, np.ndarray],
+               mask: np.ndarray) -> Dict[str, float]:
+    """Endpoint and angular error of an estimated flow over the valid pixels."""
+    u, v = flow
+    u_true, v_true = true_flow
+    return {
+        "endpoint_error": round(float(calculate_endpoint_error(u_true[mask], v_true[mask], u[mask], v[mask])), 4),
+        "angular_error": round(float(calculate_angular_error(u_true[mask], v_true[mask], u[mask], v[mask])), 4)
+    }
+
+
+def evaluate_accuracy(methods: Dict[str, Callable], frames: Dict[str, np.ndarray], motions: List[str],
+                      progress: Callable[[str, str], None] = None) -> Dict[str, Any]:
+    """
+    Score every method against the true flow of every (frame, motion) case.
+
+    Methods run one at a time through ``compare_methods`` so their
+    execution times are not inflated by each other.
+
+    Returns:
+        Per method: per-case errors and execution time, and their means
+    """
+    per_method: Dict[str, Dict[str, Any]] = {name: {"cases": {}} for name in methods}
+    for frame_name, frame in frames.items():
+        for motion in motions:
+            if progress is not None:
+                progress(frame_name, motion)
+            case = make_case(frame, motion)
+            results = compare_methods(case["frame1"], case["frame2"], methods, executor="serial")
+            for method_name, result in results.items():
+                entry = {"execution_time": result["execution_time"], "success": result["success"]}
+                if result["success"]:
+                    entry.update(score_flow(result["flow_vectors"], case["flow"], case["mask"]))
+                else:
+                    entry["error"] = result.get("error")
+                per_method[method_name]["cases"][f"{frame_name}/{motion}"] = entry
+
+    for method_name, report in per_method.items():
+        scored = [c for c in report["cases"].values() if c["success"]]
+        if scored:
+            report["summary"] = {
+                key: round(float(np.mean([c[key] for c in scored])), 4)
+                for key in ("execution_time", "endpoint_error", "angular_error")}
+            for motion in motions:
+                motion_cases = [c for k, c in report["cases"].items() if k.endswith("/" + motion) and c["success"]]
+                if motion_cases:
+                    report["summary"][motion] = {
+                        key: round(float(np.mean([c[key] for c in motion_cases])), 4)
+                        for key in ("execution_time", "endpoint_error", "angular_error")}
+    return per_method
+
+
+def pareto_front(points: Dict[str, Tuple[float, float]]) -> List[str]:
+    """Names of the (time, error) points not beaten on both axes by another point, fastest first."""
+    front = []
+    best_error = float("inf")
+    for name, (seconds, error) in sorted(points.items(), key=lambda item: (item[1][0], item[1][1])):
+        if error < best_error:
+            front.append(name)
+            best_error = error
+    return front
+
+
+def cheapest_within(report: Dict[str, Any], max_error: float, key: str = "endpoint_error") -> str:
+    """The fastest method whose mean ``key`` is at most ``max_error``, or None."""
+    candidates = [(r["summary"]["execution_time"], name) for name, r in report.items()
+                  if "summary" in r and r["summary"][key] <= max_error]
+    return min(candidates)[1] if candidates else None
+
+
+def plot_pareto(report: Dict[str, Any], motions: List[str], path: str, key: str = "endpoint_error") -> None:
+    """Speed/accuracy scatter per motion type and overall, with the Pareto front drawn, saved to ``path``."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    panels = ["all"] + list(motions)
+    columns = min(3, len(panels))
+    rows = (len(panels) + columns - 1) // columns
+    figure, axes = plt.subplots(rows, columns, figsize=(6 * columns, 4.5 * rows), squeeze=False)
+
+    for ax, panel in zip(axes.flat, panels):
+        points = {}
+        for name, r in report.items():
+            summary = r.get("summary", {})
+            figures = summary if panel == "all" else summary.get(panel)
+            if figures:
+                points[name] = (figures["execution_time"], figures[key])
+        front = pareto_front(points)
+        for name, (seconds, error) in points.items():
+            on_front = name in front
+            ax.scatter(seconds, error, color="tab:red" if on_front else "tab:blue", zorder=3)
+            ax.annotate(name, (seconds, error), fontsize=7, xytext=(4, 3), textcoords="offset points")
+        if front:
+            ax.plot([points[n][0] for n in front], [points[n][1] for n in front], color="tab:red", alpha=0.5)
+        ax.set_xscale("log")
+        ax.set_title(panel)
+        ax.set_xlabel("execution time (s)")
+        ax.set_ylabel(key.replace("_", " "))
+        ax.grid(True, which="both", alpha=0.3)
+    for ax in list(axes.flat)[len(panels):]:
+        ax.axis("off")
+
+    figure.tight_layout()
+    figure.savefig(path, dpi=120)
+    plt.close(figure)
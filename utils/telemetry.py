@@ -0,0 +1,78 @@
+import threading
+from typing import Dict, Optional, Sequence, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Upper bounds (megapixels) of the image-size buckets and their labels
+SIZE_BUCKETS = ((0.1, "0-0.1MP"), (0.5, "0.1-0.5MP"), (2.0, "0.5-2MP"), (8.0, "2-8MP"))
+LARGEST_SIZE = "8MP+"
+
+
+def size_bucket(shape: Optional[Tuple[int, ...]]) -> str:
+    """Image-size label for a (height, width) frame shape; "none" when no frames were processed."""
+    if shape is None:
+        return "none"
+    megapixels = shape[0] * shape[1] / 1e6
+    for bound, label in SIZE_BUCKETS:
+        if megapixels <= bound:
+            return label
+    return LARGEST_SIZE
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative latency histogram per label set, in the Prometheus text format."""
+
+    def __init__(self, name: str, description: str, label_names: Sequence[str],
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *labels: str) -> None:
+        """Add one observation for the given label values (in ``label_names`` order)."""
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts, then +Inf count and sum
+                series = self._series[labels] = [0] * len(self.buckets) + [0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    series[i] += 1
+            series[-2] += 1
+            series[-1] += seconds
+
+    def render(self) -> str:
+        """The histogram's HELP, TYPE and sample lines."""
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, labels)]
+            for bound, count in zip(list(self.buckets) + ["+Inf"], values):
+                bucket_labels = ",".join(pairs + [f'le="{bound}"'])
+                lines.append(f"{self.name}_bucket{{{bucket_labels}}} {count}")
+            label_text = "{" + ",".join(pairs) + "}" if pairs else ""
+            lines.append(f"{self.name}_sum{label_text} {values[-1]:.6f}")
+            lines.append(f"{self.name}_count{label_text} {values[-2]}")
+        return "\n".join(lines)
+
+
+request_latency = Histogram("flow_request_duration_seconds", "Wall time of each request.",
+                            ("endpoint", "status", "size"))
+stage_latency = Histogram("flow_stage_duration_seconds", "Time spent in each stage of a request.",
+                          ("endpoint", "stage", "size"))
+method_latency = Histogram("flow_method_duration_seconds", "Execution time of each optical flow method.",
+                           ("method", "size"))
+
+
+def render_metrics() -> str:
+    """Every histogram in the Prometheus text exposition format."""
+    return "\n".join(h.render() for h in (request_latency, stage_latency, method_latency)) + "\n"
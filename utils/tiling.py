@@ -0,0 +1,150 @@
+import os
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Tuple
+from utils.frame_context import share_frame, attach_frame, close_frames
+
+# Core tile edge in pixels; 0 disables tiling in compare_methods
+DEFAULT_TILE_SIZE = int(os.environ.get("FLOW_TILE_SIZE", "0"))
+DEFAULT_TILE_WORKERS = int(os.environ.get("FLOW_TILE_WORKERS", "0")) or None
+
+_tile_pools = {}
+_tile_pools_lock = threading.Lock()
+
+
+def _get_tile_pool(max_workers: int = None) -> ProcessPoolExecutor:
+    """Return the long-lived process pool used for tiles."""
+    with _tile_pools_lock:
+        if max_workers not in _tile_pools:
+            _tile_pools[max_workers] = ProcessPoolExecutor(max_workers=max_workers)
+        return _tile_pools[max_workers]
+
+
+def split_tiles(shape: Tuple[int, int], tile_size: int, halo: int) -> List[Tuple[Tuple[int, int, int, int], Tuple[int, int, int, int]]]:
+    """
+    Split an image into overlapping tiles.
+
+    Args:
+        shape: (height, width) of the image
+        tile_size: Edge length of the non-overlapping core of each tile
+        halo: Extra context added around each core, clamped at the image border
+
+    Returns:
+        List of (core, extended) boxes, each as (y0, y1, x0, x1)
+    """
+    h, w = shape
+    tiles = []
+    for y0 in range(0, h, tile_size):
+        for x0 in range(0, w, tile_size):
+            y1, x1 = min(h, y0 + tile_size), min(w, x0 + tile_size)
+            extended = (max(0, y0 - halo), min(h, y1 + halo), max(0, x0 - halo), min(w, x1 + halo))
+            tiles.append(((y0, y1, x0, x1), extended))
+    return tiles
+
+
+def _ramp(length: int, before: int, after: int) -> np.ndarray:
+    """
+    1-D feather weights: 1 over the core, fading linearly across the inner half of each halo.
+
+    The outer half of a halo gets no weight, since a method's output there
+    is distorted by its own border handling.
+    """
+    weights = np.ones(length, dtype=np.float32)
+    if before > 0:
+        fade = (before + 1) // 2
+        weights[:before] = 0
+        weights[before - fade:before] = (np.arange(fade, dtype=np.float32) + 0.5) / fade
+    if after > 0:
+        fade = (after + 1) // 2
+        weights[length - after:] = 0
+        weights[length - after:length - after + fade] = (np.arange(fade, 0, -1, dtype=np.float32) - 0.5) / fade
+    return weights
+
+
+def feather_weights(core: Tuple[int, int, int, int], extended: Tuple[int, int, int, int]) -> np.ndarray:
+    """Blending weights for one tile; only the halo sides facing other tiles are feathered."""
+    cy0, cy1, cx0, cx1 = core
+    ey0, ey1, ex0, ex1 = extended
+    wy = _ramp(ey1 - ey0, cy0 - ey0, ey1 - cy1)
+    wx = _ramp(ex1 - ex0, cx0 - ex0, ex1 - cx1)
+    return np.outer(wy, wx)
+
+
+def _tile_pair(frame1: np.ndarray, frame2: np.ndarray,
+               extended: Tuple[int, int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Contiguous copies of one tile of both frames, so methods never see strided views."""
+    y0, y1, x0, x1 = extended
+    return np.ascontiguousarray(frame1[y0:y1, x0:x1]), np.ascontiguousarray(frame2[y0:y1, x0:x1])
+
+
+def _run_tile(method_func, specs, extended: Tuple[int, int, int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Process-pool entry point: run a method on one tile of the shared frames."""
+    (shm1, frame1), (shm2, frame2) = [attach_frame(spec) for spec in specs]
+    try:
+        u, v = method_func(*_tile_pair(frame1, frame2, extended))
+        del frame1, frame2
+        return np.asarray(u, dtype=np.float32), np.asarray(v, dtype=np.float32)
+    finally:
+        close_frames(shm1, shm2)
+
+
+def run_tiled(method_func, frame1: np.ndarray, frame2: np.ndarray, halo: int,
+              tile_size: int = 512, max_workers: int = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Run a dense flow method tile by tile across a process pool.
+
+    The frame pair is split into ``tile_size`` cores extended by ``halo``
+    pixels of context, each tile is processed independently and the
+    results are stitched back with feathered blending over the overlaps.
+    Frames reach the workers through shared memory, so each worker only
+    materialises its own tile. Inside a pool worker the tiles run
+    serially, since workers cannot start pools of their own.
+
+    Args:
+        method_func: Optical flow method with the usual (im1, im2) -> (u, v) contract
+        frame1, frame2: Input frames
+        halo: Overlap in pixels; local methods stitch exactly when it is at
+            least twice their support radius
+        tile_size: Edge length of the tile cores
+        max_workers: Process pool size
+
+    Returns:
+        Stitched (u, v) flow at full resolution
+    """
+    h, w = frame1.shape[:2]
+    tiles = split_tiles((h, w), tile_size, halo)
+
+    u_acc = np.zeros((h, w), dtype=np.float32)
+    v_acc = np.zeros((h, w), dtype=np.float32)
+    w_acc = np.zeros((h, w), dtype=np.float32)
+
+    def accumulate(extended, core, flow):
+        y0, y1, x0, x1 = extended
+        weights = feather_weights(core, extended)
+        u_acc[y0:y1, x0:x1] += flow[0] * weights
+        v_acc[y0:y1, x0:x1] += flow[1] * weights
+        w_acc[y0:y1, x0:x1] += weights
+
+    if len(tiles) == 1 or multiprocessing.parent_process() is not None:
+        for core, extended in tiles:
+            accumulate(extended, core, method_func(*_tile_pair(frame1, frame2, extended)))
+    else:
+        shm1, spec1 = share_frame(frame1)
+        shm2, spec2 = share_frame(frame2)
+        try:
+            pool = _get_tile_pool(max_workers)
+            futures = {pool.submit(_run_tile, method_func, (spec1, spec2), extended): (core, extended)
+                       for core, extended in tiles}
+            for future in as_completed(futures):
+                core, extended = futures[future]
+                accumulate(extended, core, future.result())
+        finally:
+            for shm in (shm1, shm2):
+                shm.close()
+                shm.unlink()
+
+    u_acc /= w_acc
+    v_acc /= w_acc
+    return u_acc, v_acc
@@ -0,0 +1,42 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+class StageTimer:
+    """Wall time spent in each named stage of a request (decode, compute, encode, ...)."""
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        # (height, width) of the frames the request processed, for the size-bucketed metrics
+        self.frame_shape: Optional[Tuple[int, int]] = None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the enclosed block and add it to stage ``name``."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - started
+
+    def add(self, other: "StageTimer") -> None:
+        """Add another timer's stages to these, keeping the larger frame shape."""
+        for name, seconds in other.stages.items():
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if other.frame_shape is not None and (self.frame_shape is None or
+                                              other.frame_shape[0] * other.frame_shape[1] >
+                                              self.frame_shape[0] * self.frame_shape[1]):
+            self.frame_shape = other.frame_shape
+
+    def as_dict(self) -> Dict[str, float]:
+        """Seconds per stage, rounded for JSON responses."""
+        return {name: round(seconds, 4) for name, seconds in self.stages.items()}
+
+    def server_timing(self) -> str:
+        """The stages as a Server-Timing header value (milliseconds)."""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages.items())
+
+    def headers(self) -> Dict[str, str]:
+        """Response headers carrying the stage timings."""
+        return {"Server-Timing": self.server_timing()} if self.stages else {}